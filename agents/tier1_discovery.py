@@ -21,89 +21,121 @@ Saves: output/interaction_graph.json
 """
 
 import asyncio
+import functools
+import heapq
+import itertools
 import json
+import operator
+import orjson
 import sys
 import os
 from datetime import datetime
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
 from playwright.async_api import async_playwright, Page
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 import core.config as _cfg
-from core.tools import navigate_to_page, scroll_page
-from core.llm_router import call_llm
+from core.tools import (
+    navigate_to_page, scroll_page, block_heavy_resources, BrowserPagePool
+)
+from core.llm_router import call_llm_async, aclose_async_clients
 
 
 # ═══════════════════════════════════════════════════════════════
 # Browser helper — extracts clean structured data from a page
 # ═══════════════════════════════════════════════════════════════
 
+@functools.lru_cache(maxsize=4096)
+def _netloc(url: str) -> str:
+    return urlparse(url).netloc
+
+
 def _same_domain(url: str) -> bool:
+    # ROOT_URL is read live (backend overrides it per scan); its parse is cached
     try:
-        return urlparse(url).netloc == urlparse(_cfg.ROOT_URL).netloc
+        return _netloc(url) == _netloc(_cfg.ROOT_URL)
     except Exception:
         return False
 
 
+@functools.lru_cache(maxsize=4096)
 def _clean_url(url: str) -> str:
-    return url.split("#")[0].rstrip("/")
+    return url.partition("#")[0].rstrip("/")
+
+
+# Single in-page payload: one CDP round-trip returns everything we need
+_EXTRACT_JS = """(trackerPattern) => {
+    const bodyText = (document.body ? document.body.innerText : '').toLowerCase();
+
+    // Plain loops that stop at the cap — no full NodeList materialisation
+    const links = [];
+    const anchors = document.querySelectorAll('a[href]');
+    for (let i = 0; i < anchors.length && links.length < 40; i++) {
+        const a = anchors[i];
+        const href = a.href;
+        if (href.startsWith('http')) {
+            links.push({href: href, text: (a.innerText||'').trim().slice(0,60)});
+        }
+    }
+
+    const buttons = [];
+    const btns = document.querySelectorAll('button,[role="button"],input[type="submit"]');
+    for (let i = 0; i < btns.length && buttons.length < 20; i++) {
+        const b = btns[i];
+        const text = (b.innerText||b.value||b.getAttribute('aria-label')||'').trim().slice(0,60);
+        if (text.length > 0) {
+            buttons.push({text: text, id: b.id || '', cls: (b.className||'').split(' ')[0]});
+        }
+    }
+
+    const forms = [];
+    const fms = document.querySelectorAll('form');
+    for (let i = 0; i < fms.length && forms.length < 5; i++) {
+        const f = fms[i];
+        const fields = [];
+        const inputs = f.querySelectorAll('input,textarea');
+        for (let j = 0; j < inputs.length && fields.length < 8; j++) {
+            const name = inputs[j].name || inputs[j].type || '';
+            if (name) fields.push(name);
+        }
+        forms.push({action: f.action || '', method: f.method || 'get', fields: fields});
+    }
+
+    const trackerRe = new RegExp(trackerPattern);
+    const tracker_scripts = [];
+    const scripts = document.querySelectorAll('script[src]');
+    for (let i = 0; i < scripts.length; i++) {
+        const src = scripts[i].src;
+        if (trackerRe.test(src)) tracker_scripts.push(src);
+    }
+
+    return {
+        title: document.title,
+        links: links,
+        buttons: buttons,
+        forms: forms,
+        tracker_scripts: tracker_scripts,
+        has_dns_text: bodyText.includes('do not sell') || bodyText.includes('your privacy choices')
+            || bodyText.includes('opt-out') || bodyText.includes('california privacy'),
+    };
+}"""
 
 
 async def _extract_page_data(page: Page, url: str) -> dict:
     """Extract compact structured data from rendered page (sent to Claude)."""
     await scroll_page(page, steps=_cfg.SCROLL_STEPS)
 
-    links = await page.evaluate("""() =>
-        Array.from(document.querySelectorAll('a[href]'))
-            .map(a => ({href: a.href, text: (a.innerText||'').trim().slice(0,60)}))
-            .filter(a => a.href.startsWith('http'))
-            .slice(0, 40)
-    """)
-
-    buttons = await page.evaluate("""() =>
-        Array.from(document.querySelectorAll('button,[role="button"],input[type="submit"]'))
-            .map(b => ({
-                text: (b.innerText||b.value||b.getAttribute('aria-label')||'').trim().slice(0,60),
-                id: b.id || '',
-                cls: (b.className||'').split(' ')[0]
-            }))
-            .filter(b => b.text.length > 0)
-            .slice(0, 20)
-    """)
-
-    forms = await page.evaluate("""() =>
-        Array.from(document.querySelectorAll('form'))
-            .map(f => ({
-                action: f.action || '',
-                method: f.method || 'get',
-                fields: Array.from(f.querySelectorAll('input,textarea'))
-                    .map(i => i.name || i.type || '')
-                    .filter(Boolean).slice(0, 8)
-            }))
-            .slice(0, 5)
-    """)
-
-    tracker_scripts = await page.evaluate("""(trackers) => {
-        return Array.from(document.querySelectorAll('script[src]'))
-            .map(s => s.src)
-            .filter(src => trackers.some(t => src.includes(t)));
-    }""", _cfg.KNOWN_TRACKERS)
-
-    has_dns_text = await page.evaluate("""() => {
-        const t = document.body.innerText.toLowerCase();
-        return t.includes('do not sell') || t.includes('your privacy choices')
-            || t.includes('opt-out') || t.includes('california privacy');
-    }""")
+    data = await page.evaluate(_EXTRACT_JS, _cfg.TRACKER_PATTERN)
 
     return {
         "url":             url,
-        "title":           await page.title(),
-        "links":           links,
-        "buttons":         buttons,
-        "forms":           forms,
-        "tracker_scripts": tracker_scripts,
-        "has_dns_text":    has_dns_text,
+        "title":           data["title"],
+        "links":           data["links"],
+        "buttons":         data["buttons"],
+        "forms":           data["forms"],
+        "tracker_scripts": data["tracker_scripts"],
+        "has_dns_text":    data["has_dns_text"],
     }
 
 
@@ -111,55 +143,71 @@ async def _extract_page_data(page: Page, url: str) -> dict:
 # Tool definitions for Claude (Anthropic tool_use format)
 # ═══════════════════════════════════════════════════════════════
 
+ANALYZE_PAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "url": {
+            "type": "string",
+            "description": "URL of the page being analysed (copied from the input)"
+        },
+        "privacy_risk_score": {
+            "type": "integer",
+            "description": "Risk score 1-10. 10=highest risk (forms sending to 3rd party, trackers present, no DNS link)"
+        },
+        "risk_reasons": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Short reasons for the score"
+        },
+        "priority_urls": {
+            "type": "array",
+            "description": "URLs that should be crawled next, in priority order",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "url":      {"type": "string"},
+                    "priority": {"type": "string", "enum": ["high", "medium", "low"]},
+                    "reason":   {"type": "string"}
+                },
+                "required": ["url", "priority", "reason"]
+            }
+        },
+        "page_purpose": {
+            "type": "string",
+            "description": "What this page does (e.g. homepage, contact form, privacy policy, checkout)"
+        },
+        "trackers_loaded": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Tracker domains detected on this page"
+        },
+        "pii_risk_elements": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Elements likely to transmit PII (e.g. 'email form → pardot.com')"
+        }
+    },
+    "required": ["url", "privacy_risk_score", "priority_urls", "page_purpose"]
+}
+
 CLAUDE_TOOLS = [
     {
-        "name": "analyze_page",
+        "name": "batch_analyze_pages",
         "description": (
-            "Analyze a webpage's extracted data for privacy risk. "
-            "Return a risk score, list of priority URLs to crawl next, "
-            "and any privacy violations found on this page."
+            "Analyze several webpages' extracted data for privacy risk. "
+            "For EACH page return a risk score, list of priority URLs to "
+            "crawl next, and any privacy violations found on that page."
         ),
         "input_schema": {
             "type": "object",
             "properties": {
-                "privacy_risk_score": {
-                    "type": "integer",
-                    "description": "Risk score 1-10. 10=highest risk (forms sending to 3rd party, trackers present, no DNS link)"
-                },
-                "risk_reasons": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Short reasons for the score"
-                },
-                "priority_urls": {
+                "analyses": {
                     "type": "array",
-                    "description": "URLs that should be crawled next, in priority order",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "url":      {"type": "string"},
-                            "priority": {"type": "string", "enum": ["high", "medium", "low"]},
-                            "reason":   {"type": "string"}
-                        },
-                        "required": ["url", "priority", "reason"]
-                    }
-                },
-                "page_purpose": {
-                    "type": "string",
-                    "description": "What this page does (e.g. homepage, contact form, privacy policy, checkout)"
-                },
-                "trackers_loaded": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Tracker domains detected on this page"
-                },
-                "pii_risk_elements": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Elements likely to transmit PII (e.g. 'email form → pardot.com')"
+                    "description": "One analysis per input page, same order as the input",
+                    "items": ANALYZE_PAGE_SCHEMA
                 }
             },
-            "required": ["privacy_risk_score", "priority_urls", "page_purpose"]
+            "required": ["analyses"]
         }
     }
 ]
@@ -171,7 +219,7 @@ CLAUDE_TOOLS = [
 
 SYSTEM_PROMPT = """You are a privacy compliance analyst working as the Discovery Agent in an Autonomous Privacy Observability (APO) system.
 
-Your job is to analyze webpages during a crawl and:
+Your job is to analyze batches of webpages during a crawl and, for each page:
 1. Score the page for privacy risk (1-10)
 2. Identify which links should be crawled next and why
 3. Detect forms/scripts/elements that may violate CCPA/GPC rules
@@ -186,61 +234,129 @@ Always prioritize pages likely to:
 - Collect PII via forms
 - Lack 'Do Not Sell' opt-out links
 
-Use the analyze_page tool to return your structured analysis."""
+Use the batch_analyze_pages tool to return one structured analysis per page."""
+
+
+@functools.lru_cache(maxsize=256)
+def _rule_score(n_trackers: int, n_forms: int, has_dns: bool) -> int:
+    return min(2 * (n_trackers + n_forms) + (0 if has_dns else 3), 10)
+
+
+def _rule_based_analysis(page_data: dict) -> dict:
+    """Score a page without an LLM (used for pages the LLM did not return)."""
+    score = _rule_score(
+        len(page_data.get("tracker_scripts", ())),
+        len(page_data.get("forms", ())),
+        bool(page_data.get("has_dns_text")),
+    )
+    return {
+        "privacy_risk_score": score,
+        "priority_urls": list(
+            {"url": l["href"], "priority": "medium", "reason": "rule-based"}
+            for l in page_data.get("links", ())[:5]
+        ),
+        "page_purpose": "unknown",
+        "risk_reasons": ["rule-based scoring (no LLM available)"],
+    }
+
+
+def _compact_page(page_data: dict) -> dict:
+    """
+    Token-lean view of page_data for the prompt: same-domain links as
+    site-relative paths (off-domain links are never crawled, so dropped),
+    short link/button text, tracker scripts reduced to their domains.
+    """
+    links = []
+    for l in page_data.get("links", []):
+        href = l["href"]
+        if not _same_domain(href):
+            continue
+        u = urlparse(href)
+        links.append({"h": (u.path or "/") + (f"?{u.query}" if u.query else ""),
+                      "t": l["text"][:30]})
+    return {
+        "url":      page_data["url"],
+        "title":    page_data["title"][:80],
+        "links":    links,
+        "buttons":  [{"t": b["text"][:30], "id": b["id"]} for b in page_data.get("buttons", [])],
+        "forms":    page_data.get("forms", []),
+        "trackers": sorted({_netloc(t) for t in page_data.get("tracker_scripts", [])}),
+        "has_dns_text": page_data.get("has_dns_text", False),
+    }
 
 
-def _call_claude(page_data: dict, visited_count: int, queue_size: int) -> dict:
+async def _call_claude_batch(pages: list, visited_count: int, queue_size: int) -> list:
     """
-    Send one page's extracted data to LLM (Claude → GPT-4o fallback).
-    Returns structured result: risk score, priority URLs, etc.
+    Send a batch of pages' extracted data to LLM in ONE request
+    (Claude → GPT-4o fallback).
+    Returns one structured result per input page, in input order.
     """
-    user_message = f"""Analyze this webpage for privacy risk and crawl prioritization.
+    user_message = f"""Analyze these {len(pages)} webpages for privacy risk and crawl prioritization.
 
-Page data:
-{json.dumps(page_data, indent=2)}
+Pages data (JSON array, one object per page; link "h" is a path on the root site, "t" its text):
+{json.dumps([_compact_page(p) for p in pages], separators=(",", ":"))}
 
 Context:
 - Pages visited so far: {visited_count}
 - Current queue size: {queue_size}
 - Root site: {_cfg.ROOT_URL}
 
-Use the analyze_page tool to return your structured analysis."""
+Use the batch_analyze_pages tool to return one analysis per page, echoing each page's url."""
 
-    result = call_llm(
+    result = await call_llm_async(
         prompt=user_message,
         tools=CLAUDE_TOOLS,
         system=SYSTEM_PROMPT,
-        max_tokens=1024
+        max_tokens=min(1024 * len(pages), 8192)
     )
 
-    if result["tool_result"]:
-        return result["tool_result"]
-
-    # Rule-based fallback
-    score = len(page_data.get("tracker_scripts", [])) * 2
-    score += len(page_data.get("forms", [])) * 2
-    score += 0 if page_data.get("has_dns_text") else 3
-    score = min(score, 10)
-    return {
-        "privacy_risk_score": score,
-        "priority_urls": [
-            {"url": l["href"], "priority": "medium", "reason": "rule-based"}
-            for l in page_data.get("links", [])[:5]
-        ],
-        "page_purpose": "unknown",
-        "risk_reasons": ["rule-based scoring (no LLM available)"],
+    analyses = (result["tool_result"] or {}).get("analyses") or []
+    by_url = {
+        _clean_url(a.get("url", "")): a
+        for a in analyses if isinstance(a, dict)
     }
 
+    # Zip results back to pages; rule-based fallback for anything missing
+    return [
+        by_url.get(_clean_url(p["url"])) or _rule_based_analysis(p)
+        for p in pages
+    ]
+
 
 # ═══════════════════════════════════════════════════════════════
 # Main discovery loop
 # ═══════════════════════════════════════════════════════════════
 
-async def run_discovery_agent() -> dict:
+# ═══════════════════════════════════════════════════════════════
+# Graph indexes — node positions by privacy term, built once
+# ═══════════════════════════════════════════════════════════════
+
+_DNS_URL_TERMS = ("do-not-sell", "do_not_sell", "donotsell", "privacy-choices", "opt-out")
+
+
+def build_node_indexes(nodes: list) -> dict:
+    """
+    Single pass over the (already sorted) node list → positions of the
+    privacy-policy and Do-Not-Sell pages, highest risk first.
+    Stored as graph["indexes"] so later tiers never rescan the nodes.
+    """
+    privacy, do_not_sell = [], []
+    for i, n in enumerate(nodes):
+        value = n["value"].lower()
+        if "privacy" in value:
+            privacy.append(i)
+        if n.get("has_dns_text") or any(t in value for t in _DNS_URL_TERMS):
+            do_not_sell.append(i)
+    return {"privacy": privacy, "do_not_sell": do_not_sell}
+
+
+async def _run_discovery_agent() -> dict:
     ROOT_URL  = _cfg.ROOT_URL
     MAX_PAGES = _cfg.MAX_PAGES
     HEADLESS  = _cfg.HEADLESS
     SCROLL_STEPS = _cfg.SCROLL_STEPS
+    CRAWL_CONCURRENCY = _cfg.CRAWL_CONCURRENCY
+    LLM_BATCH_SIZE    = _cfg.LLM_BATCH_SIZE
     GRAPH_FILE   = _cfg.GRAPH_FILE
     CLAUDE_MODEL = _cfg.CLAUDE_MODEL
     print("\n" + "═"*60)
@@ -252,105 +368,127 @@ async def run_discovery_agent() -> dict:
     nodes    = []
     edges    = []
     visited  = set()
-    # Priority queue: list of (priority_int, url)
-    # Priority: high=1, medium=2, low=3
-    queue    = [(1, ROOT_URL)]
+    # Priority queue: heap of (priority_int, seq, url)
+    # Priority: high=1, medium=2, low=3; seq keeps FIFO order within a priority
+    seq      = itertools.count()
+    queue    = [(1, next(seq), ROOT_URL)]
+    enqueued: dict[str, int] = {_clean_url(ROOT_URL): 1}   # url → best priority queued
     node_map = {}   # url → node_id
     node_idx = 1
     total_llm_calls = 0
 
     async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=HEADLESS)
+        browser = await pw.chromium.launch(
+            headless=HEADLESS, args=_cfg.BROWSER_LAUNCH_ARGS
+        )
         context = await browser.new_context(
             viewport={"width": 1280, "height": 800},
             ignore_https_errors=True,
         )
-        page = await context.new_page()
-
-        while queue and len(visited) < MAX_PAGES:
-            # Pop highest priority URL
-            queue.sort(key=lambda x: x[0])
-            _, url = queue.pop(0)
-            url = _clean_url(url)
-
-            if url in visited:
-                continue
-            visited.add(url)
-
-            print(f"\n  [{len(visited):02d}/{MAX_PAGES}] {url[:70]}")
-
-            # Navigate
-            nav = await navigate_to_page(page, url)
-            if nav["status"] != "ok":
-                print(f"    ⚠ Skip: {nav.get('msg','')[:50]}")
-                continue
-
-            # Extract page data
-            page_data = await _extract_page_data(page, url)
-
-            # ── Claude analyzes the page ───────────────────────
-            print(f"    → Claude analyzing...")
-            claude_result = _call_claude(page_data, len(visited), len(queue))
-            total_llm_calls += 1
-
-            risk_score  = claude_result.get("privacy_risk_score", 5)
-            purpose     = claude_result.get("page_purpose", "unknown")
-            risk_reasons= claude_result.get("risk_reasons", [])
-            pii_risk    = claude_result.get("pii_risk_elements", [])
-            trackers    = claude_result.get("trackers_loaded", page_data["tracker_scripts"])
-
-            print(f"    ✓ Risk: {risk_score}/10 | Purpose: {purpose}")
-            if risk_reasons:
-                print(f"      Reasons: {', '.join(risk_reasons[:2])}")
-
-            # ── Build node ────────────────────────────────────
-            node_id = f"state_{node_idx:03d}"
-            node_idx += 1
-            node_map[url] = node_id
-
-            nodes.append({
-                "id":                node_id,
-                "type":              "URL",
-                "value":             url,
-                "description":       page_data["title"],
-                "page_purpose":      purpose,
-                "privacy_risk_score":risk_score,
-                "risk_reasons":      risk_reasons,
-                "pii_risk_elements": pii_risk,
-                "tracker_scripts":   trackers,
-                "has_dns_text":      page_data["has_dns_text"],
-                "buttons":           page_data["buttons"],
-                "forms":             page_data["forms"],
-                "scraped_at":        datetime.utcnow().isoformat(),
-            })
-
-            # ── Claude's priority URLs → add to queue ─────────
-            priority_map = {"high": 1, "medium": 2, "low": 3}
-            for item in claude_result.get("priority_urls", []):
-                href = _clean_url(item.get("url", ""))
-                pri  = priority_map.get(item.get("priority", "low"), 3)
-                reason = item.get("reason", "")
-
-                if not href or href in visited:
+        await block_heavy_resources(context)
+
+        async def _visit(pool: BrowserPagePool, url: str) -> dict | None:
+            async with pool.page() as page:
+                nav = await navigate_to_page(page, url)
+                if nav["status"] != "ok":
+                    print(f"    ⚠ Skip {url[:50]}: {nav.get('msg','')[:50]}")
+                    return None
+                return await _extract_page_data(page, url)
+
+        async with BrowserPagePool(context, max_pages=CRAWL_CONCURRENCY) as pool:
+            while queue and len(visited) < MAX_PAGES:
+                # Pop the next batch of highest priority URLs
+                batch_urls = []
+                while queue and len(batch_urls) < LLM_BATCH_SIZE \
+                        and len(visited) < MAX_PAGES:
+                    _, _, url = heapq.heappop(queue)
+                    url = _clean_url(url)
+                    if url in visited:
+                        continue
+                    visited.add(url)
+                    batch_urls.append(url)
+                    print(f"\n  [{len(visited):02d}/{MAX_PAGES}] {url[:70]}")
+
+                if not batch_urls:
+                    break
+
+                # Navigate + extract concurrently across the page pool
+                extracted = await asyncio.gather(
+                    *(_visit(pool, url) for url in batch_urls)
+                )
+                batch = [pd for pd in extracted if pd]
+                if not batch:
                     continue
-                if not _same_domain(href):
-                    continue  # only crawl same domain
 
-                queue.append((pri, href))
-
-                # Add edge
-                edges.append({
-                    "from":     node_id,
-                    "to":       href,
-                    "type":     "navigate",
-                    "priority": item.get("priority", "low"),
-                    "reason":   reason[:80],
-                })
+                # ── Claude analyzes the whole batch in one call ───
+                print(f"    → Claude analyzing {len(batch)} page(s)...")
+                claude_results = await _call_claude_batch(batch, len(visited), len(queue))
+                total_llm_calls += 1
+
+                for page_data, claude_result in zip(batch, claude_results):
+                    url = page_data["url"]
+                    risk_score  = claude_result.get("privacy_risk_score", 5)
+                    purpose     = claude_result.get("page_purpose", "unknown")
+                    risk_reasons= claude_result.get("risk_reasons", [])
+                    pii_risk    = claude_result.get("pii_risk_elements", [])
+                    trackers    = claude_result.get("trackers_loaded", page_data["tracker_scripts"])
+
+                    print(f"    ✓ Risk: {risk_score}/10 | Purpose: {purpose} | {url[:50]}")
+                    if risk_reasons:
+                        print(f"      Reasons: {', '.join(risk_reasons[:2])}")
+
+                    # ── Build node ────────────────────────────────
+                    node_id = f"state_{node_idx:03d}"
+                    node_idx += 1
+                    node_map[url] = node_id
+
+                    nodes.append({
+                        "id":                node_id,
+                        "type":              "URL",
+                        "value":             url,
+                        "description":       page_data["title"],
+                        "page_purpose":      purpose,
+                        "privacy_risk_score":risk_score,
+                        "risk_reasons":      risk_reasons,
+                        "pii_risk_elements": pii_risk,
+                        "tracker_scripts":   trackers,
+                        "has_dns_text":      page_data["has_dns_text"],
+                        "buttons":           page_data["buttons"],
+                        "forms":             page_data["forms"],
+                        "scraped_at":        datetime.utcnow().isoformat(),
+                    })
+
+                    # ── Claude's priority URLs → add to queue ─────
+                    priority_map = {"high": 1, "medium": 2, "low": 3}
+                    for item in claude_result.get("priority_urls", []):
+                        # Links were sent as site-relative paths; resolve against the page
+                        href = _clean_url(urljoin(url, item.get("url", "")))
+                        pri  = priority_map.get(item.get("priority", "low"), 3)
+                        reason = item.get("reason", "")
+
+                        if not href or href in visited:
+                            continue
+                        if not _same_domain(href):
+                            continue  # only crawl same domain
+
+                        # Each URL is queued once, unless it comes back at a better priority
+                        if enqueued.get(href, 4) > pri:
+                            enqueued[href] = pri
+                            heapq.heappush(queue, (pri, next(seq), href))
+
+                        # Add edge
+                        edges.append({
+                            "from":     node_id,
+                            "to":       href,
+                            "type":     "navigate",
+                            "priority": item.get("priority", "low"),
+                            "reason":   reason[:80],
+                        })
 
         await browser.close()
 
     # Sort nodes: highest risk first
-    nodes.sort(key=lambda n: -n["privacy_risk_score"])
+    nodes.sort(key=operator.itemgetter("privacy_risk_score"), reverse=True)
 
     graph = {
         "interaction_graph": {
@@ -360,10 +498,11 @@ async def run_discovery_agent() -> dict:
             "total_llm_calls":total_llm_calls,
             "nodes":          nodes,
             "edges":          edges,
-        }
+        },
+        "indexes": build_node_indexes(nodes),
     }
 
-    GRAPH_FILE.write_text(json.dumps(graph, indent=2))
+    GRAPH_FILE.write_bytes(orjson.dumps(graph, option=orjson.OPT_INDENT_2))
 
     print(f"\n  Discovery complete:")
     print(f"    Pages crawled  : {len(nodes)}")
@@ -371,11 +510,20 @@ async def run_discovery_agent() -> dict:
     print(f"    Claude calls   : {total_llm_calls}")
     print(f"    Graph saved    : {GRAPH_FILE}")
     print(f"    Top risk pages :")
-    for n in nodes[:3]:
+    for n in nodes[:3]:   # already sorted by risk, highest first
         print(f"      [{n['privacy_risk_score']}/10] {n['value'][:60]}")
 
     return graph
 
 
+async def run_discovery_agent() -> dict:
+    # The LLM clients belong to this asyncio.run() loop — close their
+    # connection pools before it ends, or every scan leaks one
+    try:
+        return await _run_discovery_agent()
+    finally:
+        await aclose_async_clients()
+
+
 if __name__ == "__main__":
     asyncio.run(run_discovery_agent())
@@ -18,10 +18,12 @@ Saves:
 
 import asyncio
 import json
+import orjson
 import time
 import sys
 import os
 from datetime import datetime
+from pathlib import Path
 from playwright.async_api import async_playwright, Browser, Page
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
@@ -31,14 +33,25 @@ from core.config import (
     ACTION_DELAY_MS, MAX_JOURNEYS, SCROLL_STEPS,
     TRAFFIC_BASELINE_FILE, TRAFFIC_COMPLIANCE_FILE,
     SESSION_BASELINE_FILE, SESSION_COMPLIANCE_FILE,
+    BROWSER_LAUNCH_ARGS,
 )
 from core.tools import (
     navigate_to_page, scroll_page, make_traffic_listener,
     save_session_state, detect_cookie_banner,
     detect_do_not_sell_link, detect_temporal_leak,
-    handle_cookie_consent
+    handle_cookie_consent, block_heavy_resources, jsonl_to_json_array
 )
-from core.llm_router import call_llm
+from core.llm_router import call_llm_async, aclose_async_clients
+from agents.tier1_discovery import build_node_indexes
+
+POLICY_TEXT_MAX = 20_000   # chars of privacy-policy body text kept for Tier 3
+
+
+async def _read_body_text(page: Page) -> str:
+    try:
+        return (await page.inner_text("body"))[:POLICY_TEXT_MAX]
+    except Exception:
+        return ""
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -96,7 +109,7 @@ Always include the homepage and privacy policy page.
 Use the decide_session_actions tool to return your decision."""
 
 
-def _plan_session_with_claude(nodes: list, max_visits: int) -> dict:
+async def _plan_session_with_claude(nodes: list, max_visits: int) -> dict:
     """
     LLM reviews the interaction graph and decides
     which pages to focus on in the session (Claude → GPT-4o fallback).
@@ -113,7 +126,7 @@ def _plan_session_with_claude(nodes: list, max_visits: int) -> dict:
         for n in nodes[:50]
     ]
 
-    result = call_llm(
+    result = await call_llm_async(
         prompt=(
             f"Here is the interaction graph ({len(nodes)} pages).\n"
             f"Select up to {max_visits} pages to visit for GPC compliance testing.\n\n"
@@ -140,36 +153,68 @@ def _plan_session_with_claude(nodes: list, max_visits: int) -> dict:
 # Per-page Claude observation (lightweight, Claude Haiku ideal)
 # ═══════════════════════════════════════════════════════════════
 
-def _observe_page_with_claude(url: str, banner: dict,
-                               dns: dict, trackers_fired: list,
-                               gpc_on: bool) -> str:
+# Fixed instructions live in the system prompt;
+# only the per-page fields are sent in the user message.
+OBSERVE_SYSTEM = (
+    "You are a privacy compliance observer for an Autonomous Privacy "
+    "Observability (APO) system. You will be given the state of one page "
+    "visited during a browser session. In one sentence, state the key "
+    "privacy compliance observation for this page."
+)
+
+
+async def _observe_page_with_claude(url: str, banner: dict,
+                                     dns: dict, trackers_fired: list,
+                                     gpc_on: bool) -> str:
     """
     Quick single-sentence observation from LLM after visiting a page.
-    Uses call_llm router (Claude → GPT-4o fallback).
+    Uses call_llm_async router (Claude → GPT-4o fallback).
     """
     prompt = (
         f"Page: {url}\n"
         f"GPC active: {gpc_on}\n"
         f"Cookie banner detected: {banner.get('banner_detected')}\n"
         f"Do Not Sell link found: {dns.get('link_found')}\n"
-        f"Trackers fired: {trackers_fired[:5]}\n\n"
-        "In one sentence, state the key privacy compliance observation for this page."
+        f"Trackers fired: {trackers_fired[:5]}"
     )
     try:
-        result = call_llm(prompt=prompt, max_tokens=100)
+        result = await call_llm_async(prompt=prompt, system=OBSERVE_SYSTEM, max_tokens=100)
         return result.get("text", "").strip()
     except Exception:
         return ""
 
 
+async def _obs_worker(queue: asyncio.Queue, observations: dict) -> None:
+    """
+    Background consumer: awaits queued per-page observations off the
+    navigation path, so a page visit never waits on the LLM round-trip.
+    """
+    while True:
+        url, banner, dns, trackers_fired, gpc_on = await queue.get()
+        try:
+            obs = await _observe_page_with_claude(
+                url, banner, dns, trackers_fired, gpc_on
+            )
+            if obs:
+                observations[url] = obs
+                print(f"      Claude: {obs[:80]}")
+        except Exception:
+            pass
+        finally:
+            queue.task_done()
+
+
 # ═══════════════════════════════════════════════════════════════
 # Single session runner
 # ═══════════════════════════════════════════════════════════════
 
 async def _run_session(browser: Browser, ordered_urls: list,
-                       gpc_on: bool, claude_plan: dict) -> dict:
+                       gpc_on: bool, claude_plan: dict,
+                       policy_url: str | None = None) -> dict:
     """
     Runs one complete session over Claude's prioritized URL list.
+    If policy_url is given, that page's body text is returned as
+    "privacy_policy_text" for Tier 3's policy check.
     """
     label   = "compliance" if gpc_on else "baseline"
     icon    = "🔒" if gpc_on else "🌐"
@@ -182,12 +227,22 @@ async def _run_session(browser: Browser, ordered_urls: list,
         extra_http_headers=headers,
         viewport={"width": 1280, "height": 800},
     )
+    await block_heavy_resources(context)
     if gpc_on:
         await context.add_init_script(GPC_JS_SCRIPT)
 
     page = await context.new_page()
 
-    traffic_log, on_request = make_traffic_listener(label)
+    traffic_file = TRAFFIC_COMPLIANCE_FILE if gpc_on else TRAFFIC_BASELINE_FILE
+    session_file = SESSION_COMPLIANCE_FILE if gpc_on else SESSION_BASELINE_FILE
+
+    # Requests are streamed to <traffic_file>.jsonl as they are captured
+    traffic_jsonl = traffic_file.with_suffix(".jsonl")
+    traffic_fp    = open(traffic_jsonl, "wb")
+    page_trackers: list = []   # tracker records of the current page only
+    traffic_log, on_request = make_traffic_listener(
+        label, sink=traffic_fp, page_trackers=page_trackers
+    )
     page.on("request", on_request)
 
     banner_results   = {}
@@ -195,66 +250,90 @@ async def _run_session(browser: Browser, ordered_urls: list,
     temporal_leaks   = []
     page_observations= {}
     pages_visited    = 0
+    policy_text      = ""
 
-    traffic_file = TRAFFIC_COMPLIANCE_FILE if gpc_on else TRAFFIC_BASELINE_FILE
-    session_file = SESSION_COMPLIANCE_FILE if gpc_on else SESSION_BASELINE_FILE
-
-    for url in ordered_urls:
-        if not url.startswith("http"):
-            continue
-
-        print(f"    [{label}] ▶ {url[:65]}")
+    obs_queue: asyncio.Queue = asyncio.Queue()
+    obs_task = asyncio.create_task(_obs_worker(obs_queue, page_observations))
 
-        pre_count    = len(traffic_log)
-        page_load_ts = int(time.time() * 1000)
-
-        nav = await navigate_to_page(page, url)
-        if nav["status"] != "ok":
-            print(f"      ⚠ {nav.get('msg','error')[:50]}")
-            continue
-
-        await scroll_page(page, steps=SCROLL_STEPS)
+    # Whatever happens mid-session, the worker is stopped, the traffic file
+    # is closed and the .jsonl is always converted to the .json artifact.
+    # traffic_log stays in memory too: Tier 3 consumes it from the result.
+    try:
+        for url in ordered_urls:
+            if not url.startswith("http"):
+                continue
 
-        # Detect cookie banner
-        banner = await detect_cookie_banner(page)
-        dns    = await detect_do_not_sell_link(page)
+            print(f"    [{label}] ▶ {url[:65]}")
 
-        # Actively click Accept (Baseline) or Reject (Compliance)
-        consent = await handle_cookie_consent(page, accept_all=not gpc_on)
-        if consent["status"] == "ok":
-            print(f"      [consent] {consent['action']} → {consent.get('button_text') or consent.get('selector', '')}")
+            page_trackers.clear()
+            page_load_ts = time.monotonic_ns() // 1_000_000
 
-        banner_results[url]   = {**banner, "consent_action": consent}
-        dns_link_results[url] = dns
+            nav = await navigate_to_page(page, url)
+            if nav["status"] != "ok":
+                print(f"      ⚠ {nav.get('msg','error')[:50]}")
+                continue
 
-        # Temporal leak (compliance only)
-        if gpc_on:
-            new_reqs = traffic_log[pre_count:]
-            leaks = detect_temporal_leak(new_reqs, page_load_ts)
-            if leaks:
-                temporal_leaks.extend([{**l, "page": url} for l in leaks])
-                print(f"      ⚠ Temporal leak: {len(leaks)} tracker(s) in <500ms")
+            await scroll_page(page, steps=SCROLL_STEPS)
 
-        # Trackers that fired on this page
-        trackers_on_page = [
-            r["domain"] for r in traffic_log[pre_count:]
-            if r.get("is_tracker")
-        ]
+            if url == policy_url:
+                policy_text = await _read_body_text(page)
 
-        # Claude quick observation (compliance session only to save cost)
-        if gpc_on and trackers_on_page:
-            obs = _observe_page_with_claude(
-                url, banner, dns, trackers_on_page, gpc_on
+            # Detect cookie banner + Do Not Sell link (independent DOM queries)
+            banner, dns = await asyncio.gather(
+                detect_cookie_banner(page),
+                detect_do_not_sell_link(page),
             )
-            if obs:
-                page_observations[url] = obs
-                print(f"      Claude: {obs[:80]}")
-
-        pages_visited += 1
 
-    await save_session_state(page, session_file)
-    traffic_file.write_text(json.dumps(traffic_log, indent=2))
-    await context.close()
+            # Actively click Accept (Baseline) or Reject (Compliance)
+            consent = await handle_cookie_consent(page, accept_all=not gpc_on)
+            if consent["status"] == "ok":
+                print(f"      [consent] {consent['action']} → {consent.get('button_text') or consent.get('selector', '')}")
+
+            banner_results[url]   = {**banner, "consent_action": consent}
+            dns_link_results[url] = dns
+
+            # Temporal leak (compliance only)
+            if gpc_on:
+                leaks = detect_temporal_leak(page_trackers, page_load_ts)
+                if leaks:
+                    temporal_leaks.extend([{**l, "page": url} for l in leaks])
+                    print(f"      ⚠ Temporal leak: {len(leaks)} tracker(s) in <500ms")
+
+            # Trackers that fired on this page
+            trackers_on_page = [r["domain"] for r in page_trackers]
+
+            # Claude quick observation (compliance session only to save cost)
+            # — queued so the next page.goto overlaps the LLM call
+            if gpc_on and trackers_on_page:
+                obs_queue.put_nowait((url, banner, dns, trackers_on_page, gpc_on))
+
+            pages_visited += 1
+
+        # Policy page not in the plan: read it on a side page — the request
+        # listener is per page, so its traffic stays out of the session log
+        if policy_url and not policy_text:
+            side = await context.new_page()
+            try:
+                if (await navigate_to_page(side, policy_url))["status"] == "ok":
+                    policy_text = await _read_body_text(side)
+            finally:
+                await side.close()
+
+        # Wait for outstanding observations before the session is finalised
+        await obs_queue.join()
+        await save_session_state(page, session_file)
+    finally:
+        obs_task.cancel()
+        try:
+            await obs_task
+        except asyncio.CancelledError:
+            pass
+        try:
+            await context.close()
+        finally:
+            traffic_fp.close()
+            jsonl_to_json_array(traffic_jsonl, traffic_file)
+            traffic_jsonl.unlink(missing_ok=True)   # the .json array is the artifact
 
     tracker_hits = [r for r in traffic_log if r.get("is_tracker")]
     print(f"\n  {icon} {label.upper()} done — "
@@ -271,6 +350,7 @@ async def _run_session(browser: Browser, ordered_urls: list,
         "temporal_leaks":    temporal_leaks,
         "page_observations": page_observations,
         "pages_visited":     pages_visited,
+        "privacy_policy_text": policy_text,
         "claude_session_plan": claude_plan,
     }
 
@@ -279,7 +359,7 @@ async def _run_session(browser: Browser, ordered_urls: list,
 # Main — Claude plans then BOTH sessions run in parallel
 # ═══════════════════════════════════════════════════════════════
 
-async def run_interaction_agent(graph: dict) -> dict:
+async def _run_interaction_agent(graph: dict) -> dict:
     print("\n" + "═"*60)
     print("  Tier 2 — Interaction Agent (Claude-Guided, Parallel)")
     print("═"*60)
@@ -287,9 +367,13 @@ async def run_interaction_agent(graph: dict) -> dict:
     nodes = graph["interaction_graph"]["nodes"]
     print(f"  Graph: {len(nodes)} nodes")
 
+    # Highest-risk privacy page; its text feeds Tier 3's policy check
+    indexes = graph.get("indexes") or build_node_indexes(nodes)
+    policy_url = nodes[indexes["privacy"][0]]["value"] if indexes["privacy"] else None
+
     # ── Claude plans the session ───────────────────────────────
     print("\n  Claude planning session strategy...")
-    plan = _plan_session_with_claude(nodes, MAX_JOURNEYS)
+    plan = await _plan_session_with_claude(nodes, MAX_JOURNEYS)
     ordered_urls = plan.get("pages_to_visit", [n["value"] for n in nodes[:MAX_JOURNEYS]])
 
     print(f"  Claude selected {len(ordered_urls)} pages to visit")
@@ -304,17 +388,17 @@ async def run_interaction_agent(graph: dict) -> dict:
     start_time = time.time()
 
     # ── Launch parallel sessions ───────────────────────────────
+    # One browser process; each session gets its own isolated context
     async with async_playwright() as pw:
-        browser1 = await pw.chromium.launch(headless=True)
-        browser2 = await pw.chromium.launch(headless=True)
+        browser = await pw.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
 
         baseline_result, compliance_result = await asyncio.gather(
-            _run_session(browser1, ordered_urls, gpc_on=False, claude_plan=plan),
-            _run_session(browser2, ordered_urls, gpc_on=True,  claude_plan=plan),
+            _run_session(browser, ordered_urls, gpc_on=False, claude_plan=plan),
+            _run_session(browser, ordered_urls, gpc_on=True,  claude_plan=plan,
+                         policy_url=policy_url),
         )
 
-        await browser1.close()
-        await browser2.close()
+        await browser.close()
 
     elapsed = time.time() - start_time
     print(f"\n  Both sessions completed in {elapsed:.1f}s (parallel)")
@@ -324,13 +408,20 @@ async def run_interaction_agent(graph: dict) -> dict:
         "compliance":      compliance_result,
         "elapsed_seconds": round(elapsed, 1),
         "claude_plan":     plan,
+        "privacy_policy_text": compliance_result.get("privacy_policy_text", ""),
     }
 
 
+async def run_interaction_agent(graph: dict) -> dict:
+    # The LLM clients belong to this asyncio.run() loop — close their
+    # connection pools before it ends, or every scan leaks one
+    try:
+        return await _run_interaction_agent(graph)
+    finally:
+        await aclose_async_clients()
+
+
 if __name__ == "__main__":
-    graph_path = os.path.join(
-        os.path.dirname(__file__), "..", "output", "interaction_graph.json"
-    )
-    with open(graph_path) as f:
-        graph = json.load(f)
+    graph_path = Path(__file__).parent.parent / "output" / "interaction_graph.json"
+    graph = orjson.loads(graph_path.read_bytes())
     asyncio.run(run_interaction_agent(graph))
@@ -12,9 +12,11 @@ Saves:
   output/evidence_report.json
 """
 
-import json
-import re
-from datetime import datetime
+import asyncio
+import hashlib
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
 import sys, os
@@ -23,36 +25,59 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 import core.config as _cfg
 from core.config import (
     COMPLIANCE_REPORT_FILE, EVIDENCE_REPORT_FILE,
-    RULES_SQL_FILE, OPENAI_API_KEY, ANTHROPIC_API_KEY,
-    CLAUDE_MODEL, OPENAI_MODEL, LLM_MAX_TOKENS,
-    KNOWN_TRACKERS
+    RULES_SQL_FILE, anthropic_key, openai_key,
+    CLAUDE_MODEL, OPENAI_MODEL, LLM_MAX_TOKENS, LLM_CONCURRENCY,
+    KNOWN_TRACKERS, LLM_CACHE_DIR, POLICY_MIN_CHARS
 )
-from core.rules_db import load_rules_db, fetch_rules
+from core.rules_db import rules_for
+from core.llm_router import async_client, aclose_async_clients
 
 
 # ═══════════════════════════════════════════════════════════════
 # PART A — Rule-based violation detectors
 # ═══════════════════════════════════════════════════════════════
 
-def _find_rule(rules: list, *keywords) -> dict | None:
+# Every rule_id fragment the detectors below look up
+_RULE_KEYS = (
+    "135b", "1798.135b", "135a", "1798.135a", "1798.100",
+    "GDPR-ePD-Art5.3", "CCPA-1798.130a5A",
+)
+
+
+def _index_rules(rules) -> dict:
+    """
+    One scan over the rules → {key: first rule whose rule_id contains key}
+    for every key in _RULE_KEYS, so detector lookups are O(1).
+    """
+    idx = {}
     for r in rules:
-        if any(k in r["rule_id"] for k in keywords):
-            return r
-    return None
+        for key in _RULE_KEYS:
+            if key in r["rule_id"]:
+                idx.setdefault(key, r)
+    return idx
 
 
-def _check_gpc_not_honored(b_log: list, c_log: list, rules: list) -> list:
+def _find_rule(rules_idx: dict, *keywords) -> dict | None:
+    return next((rules_idx[k] for k in keywords if k in rules_idx), None)
+
+
+def _aggregate_trackers(log: list) -> dict:
+    """Single pass over a traffic log → {"count": tracker requests, "domains": frozenset}."""
+    # Project the tracker "domain" column once; len/frozenset then run in C
+    tracker_domains = [r["domain"] for r in log if r.get("is_tracker")]
+    return {"count": len(tracker_domains), "domains": frozenset(tracker_domains)}
+
+
+def _check_gpc_not_honored(tracker_stats: dict, rules_idx: dict) -> list:
     """CCPA §1798.135(b)(1) — trackers fire despite GPC ON"""
-    rule = _find_rule(rules, "135b", "1798.135b")
+    rule = _find_rule(rules_idx, "135b", "1798.135b")
     if not rule:
         return []
-    b_domains = {r["domain"] for r in b_log if r.get("is_tracker")}
-    c_domains = {r["domain"] for r in c_log if r.get("is_tracker")}
+    b_count, b_domains = tracker_stats["baseline"]["count"],   tracker_stats["baseline"]["domains"]
+    c_count, c_domains = tracker_stats["compliance"]["count"], tracker_stats["compliance"]["domains"]
     violated  = sorted(b_domains & c_domains)
     if not violated:
         return []
-    b_count = len([r for r in b_log if r.get("is_tracker")])
-    c_count = len([r for r in c_log if r.get("is_tracker")])
     return [{
         "rule_id": rule["rule_id"],
         "section": rule["section_citation"],
@@ -74,9 +99,9 @@ def _check_gpc_not_honored(b_log: list, c_log: list, rules: list) -> list:
     }]
 
 
-def _check_temporal_leaks(temporal_leaks: list, rules: list) -> list:
+def _check_temporal_leaks(temporal_leaks: list, rules_idx: dict) -> list:
     """Temporal leak — tracker fires within 500ms of GPC signal"""
-    rule = _find_rule(rules, "135b", "1798.135b")
+    rule = _find_rule(rules_idx, "135b", "1798.135b")
     if not rule or not temporal_leaks:
         return []
     unique_domains = sorted({l["domain"] for l in temporal_leaks})
@@ -102,13 +127,24 @@ def _check_temporal_leaks(temporal_leaks: list, rules: list) -> list:
     }]
 
 
-def _check_dns_link(dns_results: dict, rules: list) -> list:
+def _pages_missing(results: dict, flag: str, limit: int = 10) -> tuple:
+    """One pass → (pages where `flag` is falsy, first `limit` such URLs)."""
+    count, first = 0, []
+    for url, r in results.items():
+        if not r.get(flag):
+            count += 1
+            if len(first) < limit:
+                first.append(url)
+    return count, first
+
+
+def _check_dns_link(dns_results: dict, rules_idx: dict) -> list:
     """CCPA §1798.135(a) — Do Not Sell link must be on every page"""
-    rule = _find_rule(rules, "135a", "1798.135a")
+    rule = _find_rule(rules_idx, "135a", "1798.135a")
     if not rule:
         return []
-    missing = [url for url, r in dns_results.items() if not r.get("link_found")]
-    if not missing:
+    missing_count, missing = _pages_missing(dns_results, "link_found")
+    if not missing_count:
         return []
     return [{
         "rule_id": rule["rule_id"],
@@ -117,9 +153,9 @@ def _check_dns_link(dns_results: dict, rules: list) -> list:
         "violation_type": "MISSING_DO_NOT_SELL_LINK",
         "severity": "HIGH",
         "evidence": {
-            "pages_missing_link": missing[:10],
+            "pages_missing_link": missing,
             "total_pages_checked": len(dns_results),
-            "pages_compliant": len(dns_results) - len(missing),
+            "pages_compliant": len(dns_results) - missing_count,
         },
         "penalty_min_usd": rule["violation_penalty_min"],
         "penalty_max_usd": rule["violation_penalty_max"],
@@ -130,14 +166,14 @@ def _check_dns_link(dns_results: dict, rules: list) -> list:
     }]
 
 
-def _check_cookie_banner(banner_results: dict, rules: list) -> list:
+def _check_cookie_banner(banner_results: dict, rules_idx: dict) -> list:
     """ePrivacy / CCPA §1798.130 — consent notice required"""
     rule_id = "GDPR-ePD-Art5.3" if _cfg.JURISDICTION == "GDPR" else "CCPA-1798.130a5A"
-    rule = _find_rule(rules, rule_id)
+    rule = _find_rule(rules_idx, rule_id)
     if not rule:
         return []
-    no_banner = [url for url, r in banner_results.items() if not r.get("banner_detected")]
-    if not no_banner:
+    no_banner_count, no_banner = _pages_missing(banner_results, "banner_detected")
+    if not no_banner_count:
         return []
     return [{
         "rule_id":      rule["rule_id"],
@@ -146,7 +182,7 @@ def _check_cookie_banner(banner_results: dict, rules: list) -> list:
         "violation_type": "NO_CONSENT_BANNER",
         "severity":     "MEDIUM",
         "evidence": {
-            "pages_without_banner": no_banner[:10],
+            "pages_without_banner": no_banner,
             "total_pages_checked":  len(banner_results),
         },
         "penalty_min_usd": rule.get("violation_penalty_min"),
@@ -158,17 +194,17 @@ def _check_cookie_banner(banner_results: dict, rules: list) -> list:
     }]
 
 
-def _check_pii_in_requests(c_log: list, rules: list) -> list:
+def _check_pii_in_requests(pii_requests: tuple, rules_idx: dict) -> list:
     """CCPA §1798.100 — PII must not leak through tracking URLs"""
-    rule = _find_rule(rules, "1798.100")
-    if not rule:
+    if not pii_requests:
         return []
-    pii_hits = [
-        {"url": r["url"][:150], "pii_types": r["pii_detected"]}
-        for r in c_log if r.get("pii_detected")
-    ]
-    if not pii_hits:
+    rule = _find_rule(rules_idx, "1798.100")
+    if not rule:
         return []
+    # Only materialise the 5 samples the report shows
+    total_hits  = len(pii_requests)
+    sample_hits = [{"url": r["url"][:150], "pii_types": r["pii_detected"]}
+                   for r in pii_requests[:5]]
     return [{
         "rule_id":    rule["rule_id"],
         "section":    rule["section_citation"],
@@ -176,8 +212,8 @@ def _check_pii_in_requests(c_log: list, rules: list) -> list:
         "violation_type": "PII_IN_TRACKING_REQUESTS",
         "severity":   "HIGH",
         "evidence": {
-            "total_pii_hits": len(pii_hits),
-            "sample_hits":    pii_hits[:5],
+            "total_pii_hits": total_hits,
+            "sample_hits":    sample_hits,
         },
         "penalty_min_usd": rule["violation_penalty_min"],
         "penalty_max_usd": rule["violation_penalty_max"],
@@ -192,18 +228,67 @@ def _check_pii_in_requests(c_log: list, rules: list) -> list:
 # PART B — LLM Analysis
 # ═══════════════════════════════════════════════════════════════
 
-def _check_privacy_policy_with_claude(policy_text: str) -> dict:
+def _cache_path(kind: str, model: str, payload: str) -> Path:
+    """output/.llm_cache/<kind>/<sha256 of model + exact LLM input>.json"""
+    h = hashlib.sha256(f"{model}\n{payload}".encode()).hexdigest()
+    return LLM_CACHE_DIR / kind / f"{h}.json"
+
+
+def _cache_get(path: Path):
+    try:
+        return orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+# Shape checks — only well-formed answers are written to the disk cache
+_POLICY_KEYS = ("opt_out_right", "deletion_right", "gpc_mentioned",
+                "categories_listed", "non_discrimination")
+
+
+def _valid_policy_analysis(analysis) -> bool:
+    return isinstance(analysis, dict) and all(
+        isinstance(analysis.get(k), dict) and "present" in analysis[k]
+        for k in _POLICY_KEYS
+    )
+
+
+def _valid_violation_fix(parsed) -> bool:
+    return isinstance(parsed, dict) and all(
+        isinstance(parsed.get(k), str) for k in ("plain_english", "technical_fix")
+    )
+
+
+def _cache_put(path: Path, value) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(orjson.dumps(value))
+    except OSError:
+        pass
+
+
+async def _check_privacy_policy_with_claude(policy_text: str) -> dict:
     """
     Claude 3.5 Sonnet reads the privacy policy text and checks
     whether CCPA/GDPR-required disclosures are present.
-    Falls back gracefully if no API key.
+    Falls back gracefully if no API key or too little policy text.
     """
-    if not ANTHROPIC_API_KEY:
+    stripped = policy_text.strip()
+    if len(stripped) < POLICY_MIN_CHARS:
+        return {"skipped": True, "reason": f"Policy text too short ({len(stripped)} chars)"}
+    api_key = anthropic_key()
+    if not api_key:
         return {"skipped": True, "reason": "No ANTHROPIC_API_KEY set"}
 
+    # Same policy text → same answer; skip the round-trip entirely
+    cache_path = _cache_path("claude_policy", CLAUDE_MODEL, policy_text[:6000])
+    cached = _cache_get(cache_path)
+    if cached is not None:
+        return cached
+
     try:
-        import anthropic
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        # Shared per-loop client from the router (one connection pool per key)
+        client = async_client("claude", api_key)
 
         prompt = f"""You are a privacy compliance expert. Read the following privacy policy and answer each question with YES or NO, then a one-sentence explanation.
 
@@ -226,51 +311,50 @@ Respond ONLY in this JSON format:
   "non_discrimination": {{"present": true/false, "quote": "..."}}
 }}"""
 
-        response = client.messages.create(
+        response = await client.messages.create(
             model=CLAUDE_MODEL,
             max_tokens=LLM_MAX_TOKENS,
             messages=[{"role": "user", "content": prompt}]
         )
         raw = response.content[0].text.strip()
-        # Parse JSON from response
-        json_match = re.search(r'\{.*\}', raw, re.DOTALL)
-        if json_match:
-            return {"skipped": False, "analysis": json.loads(json_match.group())}
+        # Parse JSON from response — outermost {...}, O(N) with no backtracking
+        start, end = raw.find("{"), raw.rfind("}")
+        if 0 <= start < end:
+            analysis = orjson.loads(raw[start:end + 1])
+            if _valid_policy_analysis(analysis):
+                result = {"skipped": False, "analysis": analysis}
+                _cache_put(cache_path, result)
+                return result
         return {"skipped": False, "raw": raw}
 
     except Exception as e:
         return {"skipped": True, "reason": str(e)}
 
 
-def _classify_violations_with_gpt4o(violations: list) -> list:
-    """
-    GPT-4o adds a plain-English explanation and actionable fix
-    to each violation. Falls back if no API key.
-    """
-    if not OPENAI_API_KEY or not violations:
-        return violations
-
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
+async def _classify_one_violation(client, sem: asyncio.Semaphore, v: dict) -> dict:
+    """One GPT-4o call for a single violation → {"plain_english", "technical_fix"}."""
+    violation_summary = orjson.dumps(
+        {"type": v["violation_type"], "section": v["section"],
+         "evidence_summary": str(v["evidence"])[:200]}
+    ).decode()  # compact — indentation only costs input tokens
 
-        violations_summary = json.dumps([
-            {"type": v["violation_type"], "section": v["section"],
-             "evidence_summary": str(v["evidence"])[:200]}
-            for v in violations
-        ], indent=2)
-
-        prompt = f"""You are a CCPA compliance attorney. For each violation below, provide:
+    prompt = f"""You are a CCPA compliance attorney. For the violation below, provide:
 1. A plain-English explanation (2 sentences, no legal jargon)
 2. A specific technical fix the engineering team should implement
 
-Violations:
-{violations_summary}
+Violation:
+{violation_summary}
+
+Respond as a JSON object:
+{{"plain_english": "...", "technical_fix": "..."}}"""
 
-Respond as a JSON array matching the input order:
-[{{"plain_english": "...", "technical_fix": "..."}}]"""
+    cache_path = _cache_path("gpt_violation", OPENAI_MODEL, prompt)
+    cached = _cache_get(cache_path)
+    if cached is not None:
+        return cached
 
-        response = client.chat.completions.create(
+    async with sem:
+        response = await client.chat.completions.create(
             model=OPENAI_MODEL,
             response_format={"type": "json_object"},
             messages=[
@@ -279,20 +363,53 @@ Respond as a JSON array matching the input order:
             ],
             max_tokens=LLM_MAX_TOKENS,
         )
-        raw = response.choices[0].message.content
-        parsed = json.loads(raw)
-        # GPT might return {"violations": [...]} or just [...]
-        if isinstance(parsed, dict):
-            parsed = list(parsed.values())[0]
-
-        for i, v in enumerate(violations):
-            if i < len(parsed):
-                if isinstance(parsed[i], dict):
-                    v["llm_explanation"]  = parsed[i].get("plain_english", "")
-                    v["llm_technical_fix"]= parsed[i].get("technical_fix", "")
-                else:
-                    v["llm_explanation"]  = str(parsed[i])
-                    v["llm_technical_fix"]= ""
+    parsed = orjson.loads(response.choices[0].message.content)
+    # GPT occasionally wraps the object under a known key — unwrap explicitly
+    if isinstance(parsed, dict) and "plain_english" not in parsed:
+        inner = parsed.get("violation") or parsed.get("violations") or parsed.get("results")
+        if isinstance(inner, list):
+            inner = inner[0] if inner else None
+        if isinstance(inner, dict):
+            parsed = inner
+    if _valid_violation_fix(parsed):
+        _cache_put(cache_path, parsed)
+    return parsed
+
+
+async def _classify_violations_with_gpt4o(violations: list) -> list:
+    """
+    GPT-4o adds a plain-English explanation and actionable fix
+    to each violation — one call per violation, at most LLM_CONCURRENCY
+    in flight. A failed call leaves only that violation un-enriched.
+    Falls back if no API key.
+    """
+    api_key = openai_key()
+    if not api_key or not violations:
+        return violations
+
+    try:
+        client = async_client("openai", api_key)
+        sem    = asyncio.Semaphore(LLM_CONCURRENCY)
+
+        # Submit all, then collect
+        results = await asyncio.gather(
+            *(_classify_one_violation(client, sem, v) for v in violations),
+            return_exceptions=True,
+        )
+
+        failed = 0
+        for v, parsed in zip(violations, results):
+            if isinstance(parsed, BaseException):
+                failed += 1
+                continue
+            if isinstance(parsed, dict):
+                v["llm_explanation"]  = parsed.get("plain_english", "")
+                v["llm_technical_fix"]= parsed.get("technical_fix", "")
+            else:
+                v["llm_explanation"]  = str(parsed)
+                v["llm_technical_fix"]= ""
+        if failed:
+            print(f"  [LLM] GPT-4o classification failed for {failed}/{len(violations)} violation(s)")
         return violations
 
     except Exception as e:
@@ -300,20 +417,48 @@ Respond as a JSON array matching the input order:
         return violations
 
 
+async def _run_llm_stage(policy_text: str, violations: list) -> tuple[dict, list]:
+    """
+    Claude (policy) and GPT-4o (violations) hit different providers and
+    don't depend on each other — run them concurrently.
+    """
+    async def _policy() -> dict:
+        if not policy_text:
+            return {}
+        print("      Claude: reading privacy policy...")
+        analysis = await _check_privacy_policy_with_claude(policy_text)
+        skipped = analysis.get("skipped", False)
+        print(f"      Claude: {'skipped — ' + analysis.get('reason','') if skipped else 'done ✓'}")
+        return analysis
+
+    async def _classify() -> list:
+        if not violations:
+            return violations
+        print("      GPT-4o: classifying violations...")
+        enriched = await _classify_violations_with_gpt4o(violations)
+        print("      GPT-4o: done ✓" if openai_key() else "      GPT-4o: skipped (no key)")
+        return enriched
+
+    try:
+        policy_analysis, enriched = await asyncio.gather(_policy(), _classify())
+    finally:
+        # This loop ends with the stage — release its connection pools
+        await aclose_async_clients()
+    return policy_analysis, enriched
+
+
 # ═══════════════════════════════════════════════════════════════
 # PART C — Report Builder
 # ═══════════════════════════════════════════════════════════════
 
 def _build_report(session_results: dict, violations: list,
-                  privacy_policy_analysis: dict) -> dict:
+                  privacy_policy_analysis: dict, tracker_stats: dict) -> dict:
     baseline   = session_results["baseline"]
     compliance = session_results["compliance"]
 
-    b_trackers = [r for r in baseline["traffic_log"]   if r.get("is_tracker")]
-    c_trackers = [r for r in compliance["traffic_log"] if r.get("is_tracker")]
-    violated_domains = sorted(
-        {r["domain"] for r in b_trackers} & {r["domain"] for r in c_trackers}
-    )
+    b_count, b_domains = tracker_stats["baseline"]["count"],   tracker_stats["baseline"]["domains"]
+    c_count, c_domains = tracker_stats["compliance"]["count"], tracker_stats["compliance"]["domains"]
+    violated_domains = sorted(b_domains & c_domains)
 
     severity_counts = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
     for v in violations:
@@ -328,21 +473,21 @@ def _build_report(session_results: dict, violations: list,
             "version":       "2.0",
             "target":        _cfg.ROOT_URL,
             "jurisdiction":  _cfg.JURISDICTION,
-            "generated_at":  datetime.utcnow().isoformat() + "Z",
+            "generated_at":  datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
             "elapsed_seconds": session_results.get("elapsed_seconds"),
         },
         "session_summary": {
             "baseline": {
                 "pages_visited":    baseline["pages_visited"],
                 "total_requests":   len(baseline["traffic_log"]),
-                "tracker_requests": len(b_trackers),
-                "unique_tracker_domains": sorted({r["domain"] for r in b_trackers}),
+                "tracker_requests": b_count,
+                "unique_tracker_domains": sorted(b_domains),
             },
             "compliance_gpc_on": {
                 "pages_visited":    compliance["pages_visited"],
                 "total_requests":   len(compliance["traffic_log"]),
-                "tracker_requests": len(c_trackers),
-                "unique_tracker_domains": sorted({r["domain"] for r in c_trackers}),
+                "tracker_requests": c_count,
+                "unique_tracker_domains": sorted(c_domains),
                 "temporal_leaks":   len(compliance.get("temporal_leaks", [])),
             },
         },
@@ -360,47 +505,82 @@ def _build_report(session_results: dict, violations: list,
         "violations": violations,
     }
 
-    EVIDENCE_REPORT_FILE.write_text(json.dumps(report, indent=2))
+    _write_report(report, EVIDENCE_REPORT_FILE)
     return report
 
 
+_REPORT_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def _write_report(report: dict, path: Path) -> None:
+    """
+    Stream the report to disk one top-level section at a time (and one
+    violation at a time), so peak memory is bounded by the largest single
+    section rather than the whole document. Output matches indent=2 JSON.
+    """
+    with open(path, "wb") as f:
+        f.write(b"{")
+        for i, (key, value) in enumerate(report.items()):
+            if i:
+                f.write(b",")
+            f.write(b"\n  " + orjson.dumps(key) + b": ")
+            if key == "violations" and value:
+                f.write(b"[")
+                for j, v in enumerate(value):
+                    if j:
+                        f.write(b",")
+                    f.write(b"\n    " + orjson.dumps(v, option=_REPORT_OPTS).replace(b"\n", b"\n    "))
+                f.write(b"\n  ]")
+            else:
+                f.write(orjson.dumps(value, option=_REPORT_OPTS).replace(b"\n", b"\n  "))
+        f.write(b"\n}")
+
+
 def _print_summary(report: dict):
     verdict = report["gpc_verdict"]["verdict"]
     icon    = "🚨" if verdict == "NON-COMPLIANT" else "✅"
     vs      = report["violation_summary"]
     gpc     = report["gpc_verdict"]
 
-    print("\n" + "═"*65)
-    print("  APO v2 — EVIDENCE REPORT")
-    print("═"*65)
-    print(f"  Target      : {report['report_metadata']['target']}")
-    print(f"  Jurisdiction: {report['report_metadata']['jurisdiction']}")
-    print(f"  Generated   : {report['report_metadata']['generated_at']}")
-    print(f"  Time taken  : {report['report_metadata']['elapsed_seconds']}s (parallel sessions)")
-    print(f"\n  GPC Verdict : {verdict} {icon}")
+    # Collected and written once — one stdout write instead of ~25
+    lines = []
+    lines.append("\n" + "═"*65)
+    lines.append("  APO v2 — EVIDENCE REPORT")
+    lines.append("═"*65)
+    lines.append(f"  Target      : {report['report_metadata']['target']}")
+    lines.append(f"  Jurisdiction: {report['report_metadata']['jurisdiction']}")
+    lines.append(f"  Generated   : {report['report_metadata']['generated_at']}")
+    lines.append(f"  Time taken  : {report['report_metadata']['elapsed_seconds']}s (parallel sessions)")
+    lines.append(f"\n  GPC Verdict : {verdict} {icon}")
     if gpc["domains_ignoring_gpc"]:
         for d in gpc["domains_ignoring_gpc"]:
-            print(f"    ✗ {d}")
-    print(f"  Temporal leaks detected: {gpc['temporal_leak_count']}")
-    print(f"\n  Violations  : {vs['total']}")
-    print(f"  HIGH        : {vs['severity_breakdown']['HIGH']}")
-    print(f"  MEDIUM      : {vs['severity_breakdown']['MEDIUM']}")
-    print(f"  Max Penalty : ${vs['max_potential_penalty_usd']:,.2f}")
-
-    print(f"\n  {'─'*60}")
+            lines.append(f"    ✗ {d}")
+    lines.append(f"  Temporal leaks detected: {gpc['temporal_leak_count']}")
+    lines.append(f"\n  Violations  : {vs['total']}")
+    lines.append(f"  HIGH        : {vs['severity_breakdown']['HIGH']}")
+    lines.append(f"  MEDIUM      : {vs['severity_breakdown']['MEDIUM']}")
+    lines.append(f"  Max Penalty : ${vs['max_potential_penalty_usd']:,.2f}")
+
+    lines.append(f"\n  {'─'*60}")
     for i, v in enumerate(report["violations"], 1):
         icon2 = "🔴" if v["severity"] == "HIGH" else "🟡"
-        print(f"\n  [{i}] {icon2} {v['violation_type']}")
-        print(f"       Rule : {v['rule_id']} — {v['section']}")
+        lines.append(f"\n  [{i}] {icon2} {v['violation_type']}")
+        lines.append(f"       Rule : {v['rule_id']} — {v['section']}")
         if v.get("llm_explanation"):
-            print(f"       Plain: {v['llm_explanation'][:100]}")
-    print("\n" + "═"*65)
+            lines.append(f"       Plain: {v['llm_explanation'][:100]}")
+    lines.append("\n" + "═"*65)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # ═══════════════════════════════════════════════════════════════
 # Main entry
 # ═══════════════════════════════════════════════════════════════
 
+def preload_rules(jurisdiction: str) -> int:
+    """Load rules.sql and fetch the jurisdiction's rules ahead of a run; returns the rule count."""
+    return len(rules_for(RULES_SQL_FILE, jurisdiction))
+
+
 def run_observability_agent(session_results: dict,
                              privacy_policy_text: str = "") -> dict:
     """
@@ -408,17 +588,18 @@ def run_observability_agent(session_results: dict,
     A) Rule engine → violations
     B) LLM analysis → enrich violations + policy check
     C) Build + save report
+
+    Part B runs its own event loop, so call this from a worker thread
+    (asyncio.to_thread) when an event loop is already running.
     """
     # Read live config so backend URL/jurisdiction overrides are picked up
     JURISDICTION = _cfg.JURISDICTION
     ROOT_URL     = _cfg.ROOT_URL
-    print("\n" + "═"*60)
-    print("  Tier 3 — Observability Agent")
-    print("═"*60)
+    sys.stdout.write("\n" + "═"*60 + "\n  Tier 3 — Observability Agent\n" + "═"*60 + "\n")
 
-    # Load rules
-    conn  = load_rules_db(RULES_SQL_FILE)
-    rules = fetch_rules(conn, JURISDICTION)
+    # Load rules (parsed once per jurisdiction per process; read-only views)
+    rules = rules_for(RULES_SQL_FILE, JURISDICTION)
+    rules_idx = _index_rules(rules)
     print(f"  Loaded {len(rules)} {JURISDICTION} rules from rules.sql")
 
     b_log  = session_results["baseline"]["traffic_log"]
@@ -427,33 +608,43 @@ def run_observability_agent(session_results: dict,
     ban_r  = session_results["compliance"]["banner_results"]
     t_leaks= session_results["compliance"].get("temporal_leaks", [])
 
+    # Tracker aggregates shared by Part A and Part C (one pass per log)
+    tracker_stats = {
+        "baseline":   _aggregate_trackers(b_log),
+        "compliance": _aggregate_trackers(c_log),
+    }
+    session_results["_tracker_stats"] = tracker_stats
+    # PII-carrying requests, filtered once for any detector that needs them
+    pii_requests = tuple(r for r in c_log if r.get("pii_detected"))
+
     # Part A — rule-based detectors
     print("\n  [A] Running rule-based detectors...")
-    violations = []
-    violations += _check_gpc_not_honored(b_log, c_log, rules)
-    violations += _check_temporal_leaks(t_leaks, rules)
-    violations += _check_dns_link(dns_r, rules)
-    violations += _check_cookie_banner(ban_r, rules)
-    violations += _check_pii_in_requests(c_log, rules)
+    detectors = [
+        (_check_gpc_not_honored, tracker_stats),
+        (_check_temporal_leaks,  t_leaks),
+        (_check_dns_link,        dns_r),
+        (_check_cookie_banner,   ban_r),
+        (_check_pii_in_requests, pii_requests),
+    ]
+    # Detectors are independent — submit all first, then collect in order.
+    # Safe to run in parallel: each only reads its input (tracker aggregates,
+    # result dicts, the pii tuple) and the read-only rule views, and builds
+    # its own list. A detector exception re-raises from f.result() here,
+    # after the pool has joined the other workers.
+    with ThreadPoolExecutor(max_workers=len(detectors)) as ex:
+        futures = [ex.submit(fn, data, rules_idx) for fn, data in detectors]
+        violations = [v for f in futures for v in f.result()]
     print(f"      Found {len(violations)} violations")
 
-    # Part B — LLM
+    # Part B — LLM (Claude + GPT-4o concurrently)
     print("\n  [B] LLM analysis...")
-    policy_analysis = {}
-    if privacy_policy_text:
-        print("      Claude: reading privacy policy...")
-        policy_analysis = _check_privacy_policy_with_claude(privacy_policy_text)
-        skipped = policy_analysis.get("skipped", False)
-        print(f"      Claude: {'skipped — ' + policy_analysis.get('reason','') if skipped else 'done ✓'}")
-
-    if violations:
-        print("      GPT-4o: classifying violations...")
-        violations = _classify_violations_with_gpt4o(violations)
-        print("      GPT-4o: done ✓" if OPENAI_API_KEY else "      GPT-4o: skipped (no key)")
+    policy_analysis, violations = asyncio.run(
+        _run_llm_stage(privacy_policy_text, violations)
+    )
 
     # Part C — build report
     print("\n  [C] Building evidence report...")
-    report = _build_report(session_results, violations, policy_analysis)
+    report = _build_report(session_results, violations, policy_analysis, tracker_stats)
     _print_summary(report)
 
     print(f"\n  Evidence report → {EVIDENCE_REPORT_FILE}")
@@ -14,17 +14,24 @@ CORS: http://localhost:5173 (Vite dev server)
 """
 
 import asyncio
-import json
+import gzip
+import itertools
+import mmap
 import os
+import socket
 import subprocess
 import sys
+import threading
 import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import AsyncGenerator
 
+import orjson
 import uvicorn
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
@@ -35,7 +42,8 @@ from core import security, config
 try:
     from core.supabase_store import (
         create_scan, update_scan_status,
-        push_event as _sb_push_event, save_violations, upload_file, save_scan_result
+        push_event as _sb_push_event, save_violations, upload_file, save_scan_result,
+        wait_for_uploads,
     )
     SUPABASE_ENABLED = True
 except Exception as _sb_err:
@@ -49,9 +57,40 @@ PROXY_ADDON = BASE_DIR / "proxy_addon.py"
 
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Security: only these output files may be served by /api/download
+ALLOWED_DOWNLOADS = frozenset({
+    "evidence_report.json",
+    "traffic_baseline.json",
+    "traffic_compliance.json",
+    "interaction_graph.json",
+    "session_state_baseline.json",
+    "session_state_compliance.json",
+    "raw_traffic_proxy.jsonl",
+})
+
 # ── In-memory scan registry ───────────────────────────────────────────────────
-# scan_id → {"status": ..., "events": [...], "result": {...}}
+# scan_id → {"status": ..., "events": deque([...]), "event_seq": N, "result": {...}}
 SCANS: dict[str, dict] = {}
+MAX_SCAN_EVENTS = 5000   # per-scan ring buffer; older events are dropped
+# Scans run on SCAN_POOL threads, so per-scan mutations take a lock striped
+# by scan_id — concurrent scans almost never contend on the same one.
+# (Inserting/reading a SCANS key is a single atomic dict operation.)
+_N_LOCK_SHARDS = 16
+_SCAN_LOCKS = tuple(threading.Lock() for _ in range(_N_LOCK_SHARDS))
+
+
+def _scan_lock(scan_id: str) -> threading.Lock:
+    return _SCAN_LOCKS[hash(scan_id) % _N_LOCK_SHARDS]
+
+
+# Dedicated workers for the multi-minute scan pipeline (keeps the API loop free)
+SCAN_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("APO_SCAN_WORKERS", 4)),
+    thread_name_prefix="apo-scan",
+)
+
+# Event loop serving the API — scan threads use it to wake SSE streams
+_LOOP: asyncio.AbstractEventLoop | None = None
 
 app = FastAPI(title="APO v2 Backend", version="2.0")
 
@@ -64,6 +103,24 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def _capture_loop():
+    global _LOOP
+    _LOOP = asyncio.get_running_loop()
+
+
+@app.on_event("shutdown")
+def _shutdown_scan_pool():
+    SCAN_POOL.shutdown(wait=False)
+
+
+# Map UI framework string → valid jurisdiction key (default CCPA)
+FRAMEWORK_MAP = {
+    "CCPA": "CCPA", "GDPR": "GDPR", "LGPD": "LGPD",
+    "PIPEDA": "PIPEDA", "POPIA": "POPIA",
+}
+
+
 # ── Request models ─────────────────────────────────────────────────────────────
 class ScanRequest(BaseModel):
     url: str
@@ -72,78 +129,137 @@ class ScanRequest(BaseModel):
     use_llm: bool = True
     claude_key: str = ""
     openai_key: str = ""
+    # Off → no mitmproxy process; Tier 3 then sees only Playwright-visible requests
+    capture_proxy: bool = True
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
+async def _notify_all(cond: asyncio.Condition):
+    async with cond:
+        cond.notify_all()
+
+
+def _wake_streams(scan_id: str):
+    """Wake every SSE stream waiting on this scan (safe to call from any thread)."""
+    cond = SCANS[scan_id].get("cond")
+    if cond is not None and _LOOP is not None and not _LOOP.is_closed():
+        asyncio.run_coroutine_threadsafe(_notify_all(cond), _LOOP)
+
+
+# (epoch second, "HH:MM:SS") — formatted at most once per second
+_ts_cache: tuple[int, str] = (-1, "")
+
+
+def _timestamp() -> str:
+    global _ts_cache
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+    return _ts_cache[1]
+
+
+def _sse_frame(payload: dict) -> bytes:
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
 def _emit(scan_id: str, agent: str, level: str, msg: str):
     """Push a log event into the scan registry AND Supabase."""
     event = {
-        "timestamp": time.strftime("%H:%M:%S"),
+        "timestamp": _timestamp(),
         "agent": agent,
         "level": level,
         "msg": msg,
     }
-    SCANS[scan_id]["events"].append(event)
+    with _scan_lock(scan_id):
+        scan = SCANS[scan_id]
+        event["seq"] = scan["event_seq"]
+        scan["event_seq"] += 1
+        # Encoded once here; every SSE client streams the same bytes
+        event["_sse"] = _sse_frame(event)
+        scan["events"].append(event)
+    _wake_streams(scan_id)
     if SUPABASE_ENABLED:
         try:
-            _sb_push_event(scan_id, agent, level, msg)
+            _sb_push_event(scan_id, agent, level, msg, event["timestamp"])   # queued, batched
         except Exception:
             pass
 
 
 def _set_phase(scan_id: str, phase: str, progress: int):
-    SCANS[scan_id]["phase"] = phase
-    SCANS[scan_id]["progress"][phase] = progress
+    scan = SCANS[scan_id]
+    with _scan_lock(scan_id):
+        scan["phase"] = phase
+        scan["progress"][phase] = progress
+        progress_snapshot = dict(scan["progress"])
     if SUPABASE_ENABLED:
         try:
             update_scan_status(
-                scan_id, SCANS[scan_id]["status"],
-                phase=phase, progress=SCANS[scan_id]["progress"]
+                scan_id, scan["status"],
+                phase=phase, progress=progress_snapshot
             )
         except Exception:
             pass
 
 
+def _read_jsonl(path: Path) -> list:
+    """
+    Parse a JSONL file straight out of the page cache (mmap), one newline
+    offset at a time — no line-buffered reads; blank lines are skipped.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []   # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            records, start, end = [], 0, len(mm)
+            while start < end:
+                nl = mm.find(b"\n", start)
+                if nl == -1:
+                    nl = end
+                line = mm[start:nl]
+                if line and not line.isspace():
+                    records.append(orjson.loads(line))
+                start = nl + 1
+            return records
+
+
+def _wait_port(port: int, timeout: float = 5.0) -> bool:
+    """Poll until something accepts TCP connections on localhost:port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
 # ── Background scan runner ─────────────────────────────────────────────────────
 def _run_scan(scan_id: str, req: ScanRequest):
     """
-    Runs the full 3-tier APO pipeline inside a background thread.
+    Runs the full 3-tier APO pipeline on a SCAN_POOL worker thread.
     Streams live updates into SCANS[scan_id]["events"].
     """
-    import importlib, sys as _sys
-
     scan = SCANS[scan_id]
     scan["status"] = "running"
 
-    # Override env with user-supplied keys if provided
-    if req.claude_key:
-        os.environ["ANTHROPIC_API_KEY"] = req.claude_key
-    if req.openai_key:
-        os.environ["OPENAI_API_KEY"] = req.openai_key
+    # User-supplied keys apply to this scan only (context-local, not os.environ)
+    config.CURRENT_KEYS.set({"anthropic": req.claude_key, "openai": req.openai_key})
+
+    uploads = []   # Storage futures for this scan, joined before completion
 
     apo_path = str(BASE_DIR)
-    if apo_path not in _sys.path:
-        _sys.path.insert(0, apo_path)
+    if apo_path not in sys.path:
+        sys.path.insert(0, apo_path)
 
     try:
         # ── Apply UI config to core.config ──────────────────────────────
-        import core.config as cfg
-
-        # Map UI framework string → valid jurisdiction key (default CCPA)
-        FRAMEWORK_MAP = {
-            "CCPA": "CCPA", "GDPR": "GDPR", "LGPD": "LGPD",
-            "PIPEDA": "PIPEDA", "POPIA": "POPIA",
-        }
+        cfg = config
         jurisdiction = FRAMEWORK_MAP.get(req.framework.upper(), "CCPA")
 
         cfg.ROOT_URL     = req.url
         cfg.JURISDICTION = jurisdiction
         cfg.MAX_PAGES    = req.crawl_depth * 5   # crawl_depth slider → max pages
-        # Also update API keys on cfg so Tier 3 sees them
-        if req.claude_key:
-            cfg.ANTHROPIC_API_KEY = req.claude_key
-        if req.openai_key:
-            cfg.OPENAI_API_KEY    = req.openai_key
 
         _emit(scan_id, "discovery", "INFO",
               f"Config applied — URL: {cfg.ROOT_URL}  Jurisdiction: {cfg.JURISDICTION}  Max pages: {cfg.MAX_PAGES}")
@@ -153,8 +269,7 @@ def _run_scan(scan_id: str, req: ScanRequest):
         _emit(scan_id, "discovery", "INFO", "Playwright launching browser...")
         _set_phase(scan_id, "discovery", 20)
 
-        import asyncio as _aio
-        graph = _aio.run(run_discovery_agent())
+        graph = asyncio.run(run_discovery_agent())
         pages = len(graph.get("interaction_graph", {}).get("nodes", [])) if isinstance(graph, dict) else 0
         _emit(scan_id, "discovery", "SUCCESS", f"Discovery complete — {pages} pages mapped")
         _set_phase(scan_id, "discovery", 100)
@@ -162,7 +277,8 @@ def _run_scan(scan_id: str, req: ScanRequest):
         # ── Upload interaction graph to Supabase Storage ─────────────
         if SUPABASE_ENABLED and isinstance(graph, dict):
             try:
-                url = upload_file(scan_id, "interaction_graph.json", graph)
+                # Read back only via /api/graph, which handles the gzip form
+                uploads.append(upload_file(scan_id, "interaction_graph.json", graph, compress=True))
                 _emit(scan_id, "discovery", "INFO",
                       f"Interaction graph uploaded to Supabase Storage ({pages} nodes)")
             except Exception as sb_e:
@@ -172,33 +288,39 @@ def _run_scan(scan_id: str, req: ScanRequest):
         _emit(scan_id, "interaction", "INFO", "Launching parallel GPC sessions (baseline + compliance)")
         _set_phase(scan_id, "interaction", 10)
 
-        # Start mitmproxy as subprocess for proxy capture
+        # Start mitmproxy as subprocess for proxy capture (skipped when disabled)
         proxy_port = 18080
         proxy_proc = None
-        try:
-            proxy_proc = subprocess.Popen(
-                [
-                    _sys.executable, "-m", "mitmproxy",
-                    "--listen-port", str(proxy_port),
-                    "--mode", "regular",
-                    "-s", str(PROXY_ADDON),
-                    "--quiet",
-                ],
-                cwd=str(BASE_DIR),
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            _emit(scan_id, "interaction", "INFO", f"mitmproxy started on port {proxy_port}")
-            time.sleep(2)   # give proxy time to bind
-        except Exception as px_err:
-            _emit(scan_id, "interaction", "WARNING", f"mitmproxy unavailable: {px_err} — continuing without proxy")
-            proxy_proc = None
+        if req.capture_proxy:
+            try:
+                proxy_proc = subprocess.Popen(
+                    [
+                        sys.executable, "-m", "mitmproxy",
+                        "--listen-port", str(proxy_port),
+                        "--mode", "regular",
+                        "-s", str(PROXY_ADDON),
+                        "--quiet",
+                    ],
+                    cwd=str(BASE_DIR),
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                if _wait_port(proxy_port):
+                    _emit(scan_id, "interaction", "INFO", f"mitmproxy started on port {proxy_port}")
+                else:
+                    _emit(scan_id, "interaction", "WARNING",
+                          f"mitmproxy not listening on port {proxy_port} after 5s — continuing")
+            except Exception as px_err:
+                _emit(scan_id, "interaction", "WARNING", f"mitmproxy unavailable: {px_err} — continuing without proxy")
+                proxy_proc = None
+        else:
+            _emit(scan_id, "interaction", "INFO", "Proxy capture disabled — using Playwright traffic only")
 
         try:
             from agents.tier2_interaction import run_interaction_agent
             _emit(scan_id, "interaction", "INFO", "Claude planning session actions...")
             _set_phase(scan_id, "interaction", 35)
-            session_results = _aio.run(run_interaction_agent(graph))
+            session_results = asyncio.run(run_interaction_agent(graph))
             _emit(scan_id, "interaction", "SUCCESS", "Both sessions complete — traffic captured")
             _set_phase(scan_id, "interaction", 100)
 
@@ -206,40 +328,49 @@ def _run_scan(scan_id: str, req: ScanRequest):
             if SUPABASE_ENABLED:
                 try:
                     from core.config import SESSION_BASELINE_FILE, SESSION_COMPLIANCE_FILE
-                    import json as _json
                     for fname, fpath in [
                         ("session_state_baseline.json", SESSION_BASELINE_FILE),
                         ("session_state_compliance.json", SESSION_COMPLIANCE_FILE),
                     ]:
                         if fpath.exists():
-                            upload_file(scan_id, fname, _json.loads(fpath.read_text()))
+                            uploads.append(upload_file(scan_id, fname, orjson.loads(fpath.read_bytes())))
                     _emit(scan_id, "interaction", "INFO", "Session state files uploaded to Supabase")
                 except Exception as sb_e:
                     print(f"[Supabase] session state upload failed: {sb_e}")
         finally:
             if proxy_proc:
+                # SIGTERM lets mitmproxy run the addon's done(), which flushes
+                # the last buffered records — wait for that before Tier 3 reads
+                # the file. A kill only loses the last flush interval.
                 proxy_proc.terminate()
+                try:
+                    proxy_proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proxy_proc.kill()
+                    _emit(scan_id, "interaction", "WARNING",
+                          "mitmproxy did not exit within 5s — killed (last ~1s of proxy capture may be missing)")
                 _emit(scan_id, "interaction", "INFO", "mitmproxy proxy stopped")
 
         # ── TIER 3: Observability ───────────────────────────────────────────
         _emit(scan_id, "observability", "INFO", f"Loading {cfg.JURISDICTION} rules from rules.sql")
         _set_phase(scan_id, "observability", 15)
 
-        from agents.tier3_observability import run_observability_agent
+        from agents.tier3_observability import run_observability_agent, preload_rules
 
-        # Enrich with proxy traffic if captured
+        # Enrich with proxy traffic if captured — parsed on a side thread
+        # while the rules load here, joined before the detectors need it
         proxy_traffic_file = OUTPUT_DIR / "raw_traffic_proxy.jsonl"
-        proxy_records = []
-        if proxy_traffic_file.exists():
-            with open(proxy_traffic_file) as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        proxy_records.append(json.loads(line))
-            _emit(scan_id, "observability", "INFO",
-                  f"Loaded {len(proxy_records)} proxy-captured records (richer evidence)")
-            # Inject into session_results for Tier3 analysis
-            session_results["proxy_traffic"] = proxy_records
+        with ThreadPoolExecutor(max_workers=1) as io_pool:
+            proxy_future = None
+            if req.capture_proxy and proxy_traffic_file.exists():
+                proxy_future = io_pool.submit(_read_jsonl, proxy_traffic_file)
+            preload_rules(cfg.JURISDICTION)
+            if proxy_future is not None:
+                proxy_records = proxy_future.result()
+                _emit(scan_id, "observability", "INFO",
+                      f"Loaded {len(proxy_records)} proxy-captured records (richer evidence)")
+                # Inject into session_results for Tier3 analysis
+                session_results["proxy_traffic"] = proxy_records
 
         _set_phase(scan_id, "observability", 40)
         _emit(scan_id, "observability", "INFO", "Running rule detectors...")
@@ -257,16 +388,18 @@ def _run_scan(scan_id: str, req: ScanRequest):
 
         scan["result"] = report
         scan["status"] = "complete"
+        _wake_streams(scan_id)
 
         # ── Push everything to Supabase ──────────────────────────────
         if SUPABASE_ENABLED:
             try:
                 save_violations(scan_id, violations)
-                upload_file(scan_id, "evidence_report.json", report)
+                uploads.append(upload_file(scan_id, "evidence_report.json", report))
                 baseline_log = session_results.get("baseline", {}).get("traffic_log", [])
                 compliance_log = session_results.get("compliance", {}).get("traffic_log", [])
-                upload_file(scan_id, "traffic_baseline.json", baseline_log)
-                upload_file(scan_id, "traffic_compliance.json", compliance_log)
+                uploads.append(upload_file(scan_id, "traffic_baseline.json", baseline_log))
+                uploads.append(upload_file(scan_id, "traffic_compliance.json", compliance_log))
+                wait_for_uploads(uploads)   # artifacts land before the scan row says complete
                 save_scan_result(scan_id, report)
             except Exception as sb_err:
                 print(f"[Supabase] post-scan upload error: {sb_err}")
@@ -275,31 +408,39 @@ def _run_scan(scan_id: str, req: ScanRequest):
         _emit(scan_id, "observability", "ERROR", f"Pipeline error: {exc}")
         scan["status"] = "error"
         scan["error"] = str(exc)
+        _wake_streams(scan_id)
         import traceback
         traceback.print_exc()
 
 
-# ── API routes ─────────────────────────────────────────────────────────────────
-
-@app.post("/api/scan")
-def start_scan(req: ScanRequest, background_tasks: BackgroundTasks, current_user: str = Depends(security.get_current_user)):
-    scan_id = str(uuid.uuid4())[:8]
-    SCANS[scan_id] = {
+def new_scan_entry(req: ScanRequest) -> dict:
+    """Fresh SCANS registry entry for a scan that has not started yet."""
+    return {
         "status": "pending",
-        "events": [],
+        "events": deque(maxlen=MAX_SCAN_EVENTS),
+        "event_seq": 0,
+        "cond": asyncio.Condition(),   # notified by _emit / status changes
         "result": None,
         "error": None,
         "phase": "idle",
         "progress": {"discovery": 0, "interaction": 0, "observability": 0},
         "request": req.model_dump(),
     }
+
+
+# ── API routes ─────────────────────────────────────────────────────────────────
+
+@app.post("/api/scan")
+def start_scan(req: ScanRequest, current_user: str = Depends(security.get_current_user)):
+    scan_id = str(uuid.uuid4())[:8]
+    SCANS[scan_id] = new_scan_entry(req)
     # Persist to Supabase
     if SUPABASE_ENABLED:
         try:
             create_scan(scan_id, req.url, req.framework)
         except Exception as e:
             print(f"[Supabase] create_scan failed: {e}")
-    background_tasks.add_task(_run_scan, scan_id, req)
+    SCAN_POOL.submit(_run_scan, scan_id, req)
     return {"scan_id": scan_id}
 
 
@@ -313,7 +454,7 @@ def get_status(scan_id: str, current_user: str = Depends(security.get_current_us
         "status": scan["status"],
         "phase": scan["phase"],
         "progress": scan["progress"],
-        "event_count": len(scan["events"]),
+        "event_count": scan["event_seq"],
         "error": scan.get("error"),
     }
 
@@ -324,36 +465,51 @@ async def stream_events(scan_id: str, current_user: str = Depends(security.get_c
     if scan_id not in SCANS:
         raise HTTPException(404, "Scan not found")
 
-    async def event_generator() -> AsyncGenerator[str, None]:
-        sent = 0
+    async def event_generator() -> AsyncGenerator[bytes, None]:
+        last_seq = -1
         scan = SCANS[scan_id]
-        last_yield_time = time.time()
+        cond = scan["cond"]
+
+        def _ready():
+            return scan["event_seq"] - 1 > last_seq or scan["status"] in ("complete", "error")
+
         while True:
-            events = scan["events"]
-            while sent < len(events):
-                ev = events[sent]
-                sent += 1
-                yield f"data: {json.dumps(ev)}\n\n"
-                last_yield_time = time.time()
-            if scan["status"] in ("complete", "error"):
-                # Flush remaining
-                while sent < len(scan["events"]):
-                    ev = scan["events"][sent]
-                    sent += 1
-                    yield f"data: {json.dumps(ev)}\n\n"
-                    last_yield_time = time.time()
+            finished = scan["status"] in ("complete", "error")
+            # Snapshot under the lock — the deque is appended from scan threads
+            with _scan_lock(scan_id):
+                events = scan["events"]
+                first  = events[0]["seq"] if events else scan["event_seq"]
+                pending = list(itertools.islice(events, max(last_seq + 1 - first, 0), None))
+            dropped = first - (last_seq + 1)
+            if dropped > 0:
+                yield _sse_frame({"agent": "system", "level": "WARN",
+                                  "msg": f"{dropped} events dropped", "timestamp": ""})
+            for ev in pending:
+                yield ev["_sse"]
+            if pending:
+                last_seq = pending[-1]["seq"]
+            elif dropped > 0:
+                last_seq = first - 1
+            if finished:
                 # Send terminal event
-                yield f"data: {json.dumps({'agent':'system','level':'DONE','msg':scan['status'],'timestamp':''})}\n\n"
+                yield _sse_frame({"agent": "system", "level": "DONE",
+                                  "msg": scan["status"], "timestamp": ""})
                 break
-            
-            # Keep-alive to prevent CloudFront / NGINX from dropping HTTP/2 streams
-            if time.time() - last_yield_time > 10:
-                yield ": keepalive\n\n"
-                last_yield_time = time.time()
-                
-            await asyncio.sleep(0.3)
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+            # Sleep until _emit / a status change notifies; keep-alive every 10s
+            # to prevent CloudFront / NGINX from dropping HTTP/2 streams
+            try:
+                async with cond:
+                    await asyncio.wait_for(cond.wait_for(_ready), timeout=10)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        # No caching, and no proxy buffering that would batch up log lines
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/results/{scan_id}")
@@ -373,12 +529,14 @@ def get_interaction_graph(scan_id: str, current_user: str = Depends(security.get
         try:
             from core.supabase_client import supabase
             response = supabase.storage.from_("apo-reports").download(f"{scan_id}/interaction_graph.json")
-            return json.loads(response.decode("utf-8"))
+            if response[:2] == b"\x1f\x8b":   # stored gzip-compressed (large graphs)
+                response = gzip.decompress(response)
+            return orjson.loads(response)
         except Exception as e:
             print(f"[Supabase] graph fetch failed: {e} — trying local file")
     local_path = OUTPUT_DIR / "interaction_graph.json"
     if local_path.exists():
-        return json.loads(local_path.read_text())
+        return orjson.loads(local_path.read_bytes())
     raise HTTPException(404, "Interaction graph not found for this scan")
 
 
@@ -405,22 +563,16 @@ def get_violations(scan_id: str, current_user: str = Depends(security.get_curren
 
 @app.get("/api/download/{filename}")
 def download_file(filename: str, current_user: str = Depends(security.get_current_user)):
-    # Security: only allow known output files
-    allowed = {
-        "evidence_report.json",
-        "traffic_baseline.json",
-        "traffic_compliance.json",
-        "interaction_graph.json",
-        "session_state_baseline.json",
-        "session_state_compliance.json",
-        "raw_traffic_proxy.jsonl",
-    }
-    if filename not in allowed:
+    if filename not in ALLOWED_DOWNLOADS:
+        raise HTTPException(403, "Not allowed")
+    # Defence in depth: the resolved path must still live directly in OUTPUT_DIR
+    path = (OUTPUT_DIR / filename).resolve()
+    if path.parent != OUTPUT_DIR.resolve():
         raise HTTPException(403, "Not allowed")
-    path = OUTPUT_DIR / filename
     if not path.exists():
         raise HTTPException(404, "File not found")
-    return FileResponse(path, filename=filename)
+    return FileResponse(path, filename=filename,
+                        headers={"Cache-Control": "public, max-age=60"})
 
 
 @app.get("/health")
@@ -7,21 +7,42 @@ Create a .env file in apo_v2/ with your keys:
 """
 
 import os
+import re
+from contextvars import ContextVar
 from pathlib import Path
 
 # ── Load .env if present ───────────────────────────────────────
+# python-dotenv handles quoting/escapes; the manual loop is only a fallback.
+# Existing environment variables always win (override=False / setdefault).
 _env_path = Path(__file__).parent.parent / ".env"
 if _env_path.exists():
-    for line in _env_path.read_text().splitlines():
-        line = line.strip()
-        if line and not line.startswith("#") and "=" in line:
-            k, v = line.split("=", 1)
-            os.environ.setdefault(k.strip(), v.strip())
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_env_path, override=False)
+    except ImportError:
+        for line in _env_path.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                k, v = line.split("=", 1)
+                os.environ.setdefault(k.strip(), v.strip())
 
 # ── API Keys ───────────────────────────────────────────────────
 OPENAI_API_KEY     = os.getenv("OPENAI_API_KEY", "")
 ANTHROPIC_API_KEY  = os.getenv("ANTHROPIC_API_KEY", "")
 
+# Per-scan key overrides ({"anthropic": ..., "openai": ...}). A ContextVar is
+# local to the scan's thread and inherited by the asyncio tasks it starts, so
+# concurrent scans never see each other's keys.
+CURRENT_KEYS: ContextVar[dict] = ContextVar("CURRENT_KEYS", default={})
+
+
+def anthropic_key() -> str:
+    return CURRENT_KEYS.get().get("anthropic") or ANTHROPIC_API_KEY
+
+
+def openai_key() -> str:
+    return CURRENT_KEYS.get().get("openai") or OPENAI_API_KEY
+
 # ── Security ───────────────────────────────────────────────────
 # Token matching is handled statically in core/security.py
 
@@ -44,10 +65,20 @@ EVIDENCE_REPORT_FILE   = OUTPUT_DIR / "evidence_report.json"
 
 RULES_SQL_FILE         = BASE_DIR / "rules.sql"
 
+# Disk cache for LLM results keyed by a hash of the exact input
+LLM_CACHE_DIR          = OUTPUT_DIR / ".llm_cache"
+
 # ── Crawler (Tier 1) ────────────────────────────────────────────
 MAX_PAGES          = 10             # max pages to crawl
 SCROLL_STEPS       = 3             # scroll iterations per page
 HEADLESS           = True          # False = watch browser live
+CRAWL_CONCURRENCY  = 4             # pages navigated in parallel
+LLM_BATCH_SIZE     = 8             # pages analysed per LLM call
+
+# ── Browser (Tier 1 + Tier 2) ──────────────────────────────────
+BROWSER_LAUNCH_ARGS = ["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"]
+# Resource types never needed for privacy analysis (tracker hosts are never blocked)
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
 
 # ── Interaction (Tier 2) ───────────────────────────────────────
 MAX_JOURNEYS       = 20            # pages to visit per session
@@ -84,6 +115,15 @@ KNOWN_TRACKERS = [
     "twitter.com", "analytics.twitter.com",
     "tiktok.com", "analytics.tiktok.com",
 ]
+# Single alternation of all tracker domains — valid in both Python re and JS RegExp
+TRACKER_PATTERN = "|".join(re.escape(t) for t in KNOWN_TRACKERS)
+KNOWN_TRACKER_SUFFIXES = frozenset(KNOWN_TRACKERS)
+
+
+def is_tracker(host: str) -> bool:
+    """True if host (optionally with :port) is, or is a subdomain of, a known tracker."""
+    labels = host.partition(":")[0].lower().strip(".").split(".")
+    return any(".".join(labels[i:]) in KNOWN_TRACKER_SUFFIXES for i in range(len(labels) - 1))
 
 # ── PII Patterns ───────────────────────────────────────────────
 PII_PATTERNS = {
@@ -96,6 +136,12 @@ PII_PATTERNS = {
     "phone":        r"phone=[^&]+",
     "name":         r"(first_name|last_name|fullname)=[^&]+",
 }
+# All patterns in one case-insensitive alternation — m.lastgroup names the hit.
+# Matches are non-overlapping, so use it to find *whether* a URL carries PII,
+# then PII_PATTERNS for the full list of types.
+PII_REGEX = re.compile(
+    "|".join(f"(?P<{k}>{v})" for k, v in PII_PATTERNS.items()), re.IGNORECASE
+)
 
 # ── LLM Models ─────────────────────────────────────────────────
 # Claude  : best for long document reading (privacy policy)
@@ -103,3 +149,5 @@ PII_PATTERNS = {
 CLAUDE_MODEL   = "claude-3-5-haiku-20241022"
 OPENAI_MODEL   = "gpt-4o"
 LLM_MAX_TOKENS = 1500
+LLM_CONCURRENCY = 8                # max in-flight per-item LLM calls
+POLICY_MIN_CHARS = 500             # shorter policy text is not worth an LLM call
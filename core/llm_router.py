@@ -5,14 +5,159 @@ Tries Claude first → falls back to GPT-4o → falls back to rules.
 All agents call this module instead of hitting APIs directly.
 """
 
+import asyncio
+import functools
 import json
+import weakref
 from core.config import (
-    ANTHROPIC_API_KEY, OPENAI_API_KEY,
+    anthropic_key, openai_key,
     CLAUDE_MODEL, OPENAI_MODEL
 )
 
-_anthropic_ok = bool(ANTHROPIC_API_KEY)
-_openai_ok    = bool(OPENAI_API_KEY)
+# SDK clients are built once per API key and reused, so every call shares
+# one HTTP connection pool (keep-alive) instead of a fresh TCP/TLS handshake.
+@functools.lru_cache(maxsize=4)
+def _claude_client(api_key: str):
+    import anthropic
+    return anthropic.Anthropic(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=4)
+def _openai_client(api_key: str):
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+
+# Async clients hold an httpx.AsyncClient bound to the loop that first used
+# it, and the agents run under separate asyncio.run() calls — so keep one
+# set per event loop; each agent closes its loop's set with
+# aclose_async_clients() when its run ends.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def async_client(provider: str, api_key: str):
+    """
+    Shared async SDK client ("claude" or "openai") for this key and the
+    running loop. For callers that need SDK options call_llm_async does
+    not expose (e.g. response_format); they must also await
+    aclose_async_clients() before their loop ends.
+    """
+    per_loop = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = per_loop.get((provider, api_key))
+    if client is None:
+        if provider == "claude":
+            import anthropic
+            client = anthropic.AsyncAnthropic(api_key=api_key)
+        else:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=api_key)
+        per_loop[(provider, api_key)] = client
+    return client
+
+
+async def aclose_async_clients() -> None:
+    """Close this loop's async clients — call before asyncio.run() tears it down."""
+    per_loop = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in per_loop.values():
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+# Agents pass module-level tool lists (CLAUDE_TOOLS, SESSION_TOOLS), so the
+# OpenAI variant is built once per list and reused.
+_TOOL_CACHE: dict[int, tuple] = {}
+
+
+def _openai_tools(tools: list) -> list:
+    """OpenAI function-calling format for an Anthropic-style tool list."""
+    hit = _TOOL_CACHE.get(id(tools))
+    if hit and hit[0] is tools:
+        return hit[1]
+    oai_tools = [
+        {
+            "type": "function",
+            "function": {
+                "name":        t["name"],
+                "description": t["description"],
+                "parameters":  t["input_schema"],
+            }
+        }
+        for t in tools
+    ]
+    # Keep a reference to `tools` so its id() cannot be reused while cached
+    _TOOL_CACHE[id(tools)] = (tools, oai_tools)
+    return oai_tools
+
+
+# ── Request / response shaping shared by call_llm and call_llm_async ──
+def _claude_kwargs(prompt: str, tools: list, system: str, max_tokens: int) -> dict:
+    # No prompt-cache markers: every agent's system + tool prefix is below
+    # claude-3-5-haiku's 2048-token minimum, so they would never be cached
+    kwargs = dict(
+        model=CLAUDE_MODEL,
+        max_tokens=max_tokens,
+        messages=[{"role": "user", "content": prompt}],
+    )
+    if system:
+        kwargs["system"] = system
+    if tools:
+        kwargs["tools"] = tools
+    return kwargs
+
+
+def _claude_result(resp) -> dict:
+    # Extract tool_use block if present
+    for block in resp.content:
+        if block.type == "tool_use":
+            return {
+                "provider":    "claude",
+                "tool_result": block.input,
+                "text":        ""
+            }
+    # Plain text response
+    return {
+        "provider":    "claude",
+        "tool_result": None,
+        "text":        resp.content[0].text if resp.content else ""
+    }
+
+
+def _openai_kwargs(prompt: str, tools: list, system: str, max_tokens: int) -> dict:
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+
+    # Convert Anthropic-style tools to OpenAI format if provided
+    oai_tools = _openai_tools(tools) if tools else None
+
+    kwargs = dict(model=OPENAI_MODEL, messages=messages, max_tokens=max_tokens)
+    if oai_tools:
+        kwargs["tools"]       = oai_tools
+        kwargs["tool_choice"] = "required"
+    return kwargs
+
+
+def _openai_result(resp) -> dict:
+    choice = resp.choices[0]
+
+    # Tool call result
+    if choice.message.tool_calls:
+        tc = choice.message.tool_calls[0]
+        return {
+            "provider":    "gpt4o",
+            "tool_result": json.loads(tc.function.arguments),
+            "text":        ""
+        }
+    return {
+        "provider":    "gpt4o",
+        "tool_result": None,
+        "text":        choice.message.content or ""
+    }
 
 
 def call_llm(prompt: str, tools: list = None,
@@ -23,87 +168,62 @@ def call_llm(prompt: str, tools: list = None,
 
     Priority: Claude → GPT-4o → None (caller uses rule fallback)
     """
+    claude_key, oai_key = anthropic_key(), openai_key()
+
     # ── Try Claude ─────────────────────────────────────────────
-    if _anthropic_ok:
+    if claude_key:
         try:
-            import anthropic
-            client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-            kwargs = dict(
-                model=CLAUDE_MODEL,
-                max_tokens=max_tokens,
-                messages=[{"role": "user", "content": prompt}]
+            client = _claude_client(claude_key)
+            resp = client.messages.create(
+                **_claude_kwargs(prompt, tools, system, max_tokens)
             )
-            if system:
-                kwargs["system"] = system
-            if tools:
-                kwargs["tools"] = tools
-
-            resp = client.messages.create(**kwargs)
-
-            # Extract tool_use block if present
-            for block in resp.content:
-                if block.type == "tool_use":
-                    return {
-                        "provider":    "claude",
-                        "tool_result": block.input,
-                        "text":        ""
-                    }
-            # Plain text response
-            return {
-                "provider":    "claude",
-                "tool_result": None,
-                "text":        resp.content[0].text if resp.content else ""
-            }
+            return _claude_result(resp)
         except Exception as e:
             print(f"  [LLM] Claude failed ({type(e).__name__}), trying GPT-4o...")
 
     # ── Try GPT-4o ─────────────────────────────────────────────
-    if _openai_ok:
+    if oai_key:
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=OPENAI_API_KEY)
-
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-
-            # Convert Anthropic-style tools to OpenAI format if provided
-            oai_tools = None
-            if tools:
-                oai_tools = [
-                    {
-                        "type": "function",
-                        "function": {
-                            "name":        t["name"],
-                            "description": t["description"],
-                            "parameters":  t["input_schema"],
-                        }
-                    }
-                    for t in tools
-                ]
-
-            kwargs = dict(model=OPENAI_MODEL, messages=messages, max_tokens=max_tokens)
-            if oai_tools:
-                kwargs["tools"]       = oai_tools
-                kwargs["tool_choice"] = "required"
-
-            resp = client.chat.completions.create(**kwargs)
-            choice = resp.choices[0]
-
-            # Tool call result
-            if choice.message.tool_calls:
-                tc = choice.message.tool_calls[0]
-                return {
-                    "provider":    "gpt4o",
-                    "tool_result": json.loads(tc.function.arguments),
-                    "text":        ""
-                }
-            return {
-                "provider":    "gpt4o",
-                "tool_result": None,
-                "text":        choice.message.content or ""
-            }
+            client = _openai_client(oai_key)
+            resp = client.chat.completions.create(
+                **_openai_kwargs(prompt, tools, system, max_tokens)
+            )
+            return _openai_result(resp)
+        except Exception as e:
+            print(f"  [LLM] GPT-4o failed ({type(e).__name__}): {e}")
+
+    # ── No LLM available ───────────────────────────────────────
+    return {"provider": "none", "tool_result": None, "text": ""}
+
+
+async def call_llm_async(prompt: str, tools: list = None,
+                         system: str = "", max_tokens: int = 1024) -> dict:
+    """
+    Async call_llm — same contract and fallback order, but awaits the
+    SDKs' async clients so agents can overlap prompts with browser work
+    (or with each other via asyncio.gather).
+    """
+    claude_key, oai_key = anthropic_key(), openai_key()
+
+    # ── Try Claude ─────────────────────────────────────────────
+    if claude_key:
+        try:
+            client = async_client("claude", claude_key)
+            resp = await client.messages.create(
+                **_claude_kwargs(prompt, tools, system, max_tokens)
+            )
+            return _claude_result(resp)
+        except Exception as e:
+            print(f"  [LLM] Claude failed ({type(e).__name__}), trying GPT-4o...")
+
+    # ── Try GPT-4o ─────────────────────────────────────────────
+    if oai_key:
+        try:
+            client = async_client("openai", oai_key)
+            resp = await client.chat.completions.create(
+                **_openai_kwargs(prompt, tools, system, max_tokens)
+            )
+            return _openai_result(resp)
         except Exception as e:
             print(f"  [LLM] GPT-4o failed ({type(e).__name__}): {e}")
 
@@ -3,18 +3,23 @@ APO v2 — Rules DB
 Loads rules.sql into in-memory SQLite and exposes query helpers.
 """
 
+import functools
 import sqlite3
 import re
+import threading
 from pathlib import Path
+from types import MappingProxyType
 
+# Serialises statements on connections shared across scan threads
+_DB_LOCK = threading.RLock()
 
-def load_rules_db(sql_file: Path) -> sqlite3.Connection:
+
+def _parse_rules_sql(sql_file: Path) -> sqlite3.Connection:
     """
     Parse rules.sql → execute CREATE TABLE + INSERT statements
     into an in-memory SQLite database.
     """
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
 
     sql_text = Path(sql_file).read_text()
     # Strip SQL comments
@@ -30,30 +35,72 @@ def load_rules_db(sql_file: Path) -> sqlite3.Connection:
                 conn.execute(stmt)
             except sqlite3.Error:
                 pass
+    # Lookup columns
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rules_reg ON compliance_rules(regulation_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rules_id ON compliance_rules(rule_id)")
     conn.commit()
     return conn
 
 
+def load_rules_db(sql_file: Path) -> sqlite3.Connection:
+    """Fresh in-memory SQLite database holding the rules from rules.sql."""
+    conn = _parse_rules_sql(sql_file)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@functools.lru_cache(maxsize=4)
+def _shared_conn(sql_path: str) -> sqlite3.Connection:
+    return load_rules_db(Path(sql_path))
+
+
+def get_shared_rules_conn(sql_file: Path) -> sqlite3.Connection:
+    """
+    Process-wide read-only rules connection (do not close).
+    Query it through the helpers below, which hold the module lock.
+    """
+    return _shared_conn(str(Path(sql_file).resolve()))
+
+
+@functools.lru_cache(maxsize=8)
+def _rules_for(sql_path: str, regulation_id: str) -> tuple:
+    return tuple(
+        MappingProxyType(r) for r in fetch_rules(_shared_conn(sql_path), regulation_id)
+    )
+
+
+def rules_for(sql_file: Path, regulation_id: str) -> tuple:
+    """
+    The rules of one regulation from the shared connection, fetched once per
+    process. Entries are read-only mapping views, safe to share between scans;
+    use fetch_rules() for dicts you intend to modify.
+    """
+    return _rules_for(str(Path(sql_file).resolve()), regulation_id)
+
+
 def fetch_rules(conn: sqlite3.Connection, regulation_id: str) -> list[dict]:
     """Return all rules for CCPA or GDPR."""
-    cur = conn.execute(
-        """SELECT rule_id, section_citation, rule_title,
-                  rule_text, violation_penalty_min, violation_penalty_max
-           FROM compliance_rules WHERE regulation_id = ?""",
-        (regulation_id,)
-    )
-    return [dict(row) for row in cur.fetchall()]
+    with _DB_LOCK:
+        cur = conn.execute(
+            """SELECT rule_id, section_citation, rule_title,
+                      rule_text, violation_penalty_min, violation_penalty_max
+               FROM compliance_rules WHERE regulation_id = ?""",
+            (regulation_id,)
+        )
+        return [dict(row) for row in cur.fetchall()]
 
 
 def get_rule(conn: sqlite3.Connection, rule_id: str) -> dict | None:
     """Fetch a single rule by its ID."""
-    cur = conn.execute(
-        "SELECT * FROM compliance_rules WHERE rule_id = ?", (rule_id,)
-    )
-    row = cur.fetchone()
+    with _DB_LOCK:
+        cur = conn.execute(
+            "SELECT * FROM compliance_rules WHERE rule_id = ?", (rule_id,)
+        )
+        row = cur.fetchone()
     return dict(row) if row else None
 
 
 def list_all_rules(conn: sqlite3.Connection) -> list[dict]:
-    cur = conn.execute("SELECT rule_id, regulation_id, rule_title FROM compliance_rules")
-    return [dict(row) for row in cur.fetchall()]
+    with _DB_LOCK:
+        cur = conn.execute("SELECT rule_id, regulation_id, rule_title FROM compliance_rules")
+        return [dict(row) for row in cur.fetchall()]
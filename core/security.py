@@ -1,3 +1,4 @@
+import hmac
 import json
 from pathlib import Path
 from fastapi import Depends, HTTPException, status
@@ -24,6 +25,9 @@ def _load_static_token() -> str:
     except Exception:
         return ""
 
+# Read once at import — token.json is static for the life of the process
+_EXPECTED_TOKEN = _load_static_token().encode()
+
 from fastapi import Request
 def get_current_user(request: Request):
     """FastAPI dependency to validate requests against the static token."""
@@ -44,10 +48,8 @@ def get_current_user(request: Request):
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    expected_token = _load_static_token()
-    
-    # Exact match required
-    if not expected_token or token != expected_token:
+    # Exact match required (constant-time compare)
+    if not _EXPECTED_TOKEN or not hmac.compare_digest(token.encode(), _EXPECTED_TOKEN):
         raise credentials_exception
 
     return "authorized_user"
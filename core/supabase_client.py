@@ -1,5 +1,8 @@
 from supabase import create_client
+from supabase.lib.client_options import ClientOptions
 from dotenv import load_dotenv
+import atexit
+import functools
 import os
 
 load_dotenv()
@@ -7,4 +10,44 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """
+    The process-wide client. The PostgREST and Storage sub-clients each keep
+    one pooled, keep-alive httpx session for the life of the process; bound
+    how long a call may hang.
+    """
+    return create_client(
+        SUPABASE_URL, SUPABASE_KEY,
+        options=ClientOptions(postgrest_client_timeout=10, storage_client_timeout=10),
+    )
+
+
+supabase = get_client()
+
+
+def _reset_after_fork():
+    # A forked child must not share the parent's sockets / SSL state
+    global supabase
+    get_client.cache_clear()
+    supabase = get_client()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def close():
+    """Release the pooled HTTP connections (PostgREST + Storage)."""
+    client = get_client()
+    for api in (client.postgrest, client.storage):
+        http = getattr(api, "session", None) or getattr(api, "_client", None)
+        if http is not None and hasattr(http, "close"):
+            try:
+                http.close()
+            except Exception:
+                pass
+
+
+atexit.register(close)
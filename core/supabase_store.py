@@ -46,9 +46,59 @@ Required Supabase tables (run schema.sql once in Supabase SQL editor):
 Storage bucket: create a bucket called 'apo-reports' in Supabase dashboard.
 """
 
-import json
+import atexit
+import gzip
+import queue
+import random
+import threading
 import time
-from core.supabase_client import supabase
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import httpx
+import orjson
+from postgrest.exceptions import APIError
+
+from core.supabase_client import get_client, SUPABASE_URL
+
+
+# ─────────────────────────────────────────────────────────────────
+# RETRY — transient network / gateway errors only
+# ─────────────────────────────────────────────────────────────────
+
+_TRANSIENT_HTTP = frozenset({"408", "429", "500", "502", "503", "504"})
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, httpx.TransportError):
+        return True
+    # PostgREST reports SQL errors with a SQLSTATE code (never retried) and
+    # gateway failures with the HTTP status or no code at all
+    if isinstance(e, APIError):
+        return not e.code or str(e.code) in _TRANSIENT_HTTP
+    # Storage API errors carry the HTTP status; 4xx / auth failures never succeed
+    status = getattr(e, "status", None)
+    return status is not None and str(status) in _TRANSIENT_HTTP
+
+
+# Failures before the request left the client — the server cannot have
+# applied the write, so even a plain INSERT is safe to resend
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _with_retry(fn, tries: int = 3, idempotent: bool = True):
+    """
+    Call fn(), retrying transient failures with capped, jittered backoff.
+    idempotent=False (plain INSERTs): a read timeout or 5xx may come after
+    the server committed, so only connect-phase errors are retried.
+    """
+    for i in range(tries):
+        try:
+            return fn()
+        except Exception as e:
+            retry = _is_transient(e) if idempotent else isinstance(e, _NOT_SENT)
+            if i == tries - 1 or not retry:
+                raise
+            time.sleep(min(8, 2 ** i) + random.random() * 0.2)
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -58,14 +108,14 @@ from core.supabase_client import supabase
 def create_scan(scan_id: str, url: str, framework: str):
     """Insert a new scan record when a scan starts."""
     try:
-        supabase.table("scans").insert({
+        _with_retry(lambda: get_client().table("scans").insert({
             "scan_id":   scan_id,
             "status":    "pending",
             "phase":     "idle",
             "url":       url,
             "framework": framework,
             "progress":  {"discovery": 0, "interaction": 0, "observability": 0},
-        }).execute()
+        }).execute(), idempotent=False)
         print(f"  [Supabase] Scan {scan_id} created in DB")
     except Exception as e:
         print(f"  [Supabase] create_scan error: {e}")
@@ -80,7 +130,7 @@ def update_scan_status(scan_id: str, status: str, phase: str = None,
             data["phase"] = phase
         if progress:
             data["progress"] = progress
-        supabase.table("scans").update(data).eq("scan_id", scan_id).execute()
+        _with_retry(lambda: get_client().table("scans").update(data).eq("scan_id", scan_id).execute())
     except Exception as e:
         print(f"  [Supabase] update_scan_status error: {e}")
 
@@ -89,12 +139,12 @@ def save_scan_result(scan_id: str, report: dict):
     """Save final summary stats when scan completes."""
     try:
         vs = report.get("violation_summary", {})
-        supabase.table("scans").update({
+        _with_retry(lambda: get_client().table("scans").update({
             "status": "complete",
             "phase": "done",
             "progress": {"discovery": 100, "interaction": 100, "observability": 100},
             "updated_at": "now()",
-        }).eq("scan_id", scan_id).execute()
+        }).eq("scan_id", scan_id).execute())
         print(f"  [Supabase] Scan {scan_id} marked complete")
     except Exception as e:
         print(f"  [Supabase] save_scan_result error: {e}")
@@ -104,45 +154,120 @@ def save_scan_result(scan_id: str, report: dict):
 # SCAN EVENTS TABLE  (live log streaming)
 # ─────────────────────────────────────────────────────────────────
 
-def push_event(scan_id: str, agent: str, level: str, msg: str):
-    """Push a live log event to Supabase (used alongside SSE)."""
+# Events are queued and inserted in batches by one daemon thread, so a
+# log line never waits on an HTTP round-trip.
+_EVENT_BATCH_MAX   = 500
+_EVENT_BATCH_DELAY = 0.2     # seconds to let a batch fill
+
+_event_queue: queue.Queue = queue.Queue()
+_writer_lock    = threading.Lock()
+_writer_started = False
+
+
+def _event_writer():
+    while True:
+        batch = [_event_queue.get()]
+        deadline = time.monotonic() + _EVENT_BATCH_DELAY
+        while len(batch) < _EVENT_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_event_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            push_events(batch)
+        finally:
+            for _ in batch:
+                _event_queue.task_done()
+
+
+def _ensure_writer():
+    global _writer_started
+    if _writer_started:
+        return
+    with _writer_lock:
+        if not _writer_started:
+            threading.Thread(target=_event_writer, name="sb-events", daemon=True).start()
+            atexit.register(flush_events)
+            _writer_started = True
+
+
+def push_event(scan_id: str, agent: str, level: str, msg: str,
+               timestamp: str | None = None):
+    """
+    Queue a live log event for Supabase (used alongside SSE). Never blocks.
+    Pass the "HH:MM:SS" the caller already formatted to keep both logs in step.
+    """
+    _ensure_writer()
+    _event_queue.put_nowait({
+        "scan_id":   scan_id,
+        "timestamp": timestamp or time.strftime("%H:%M:%S"),
+        "agent":     agent,
+        "level":     level,
+        "msg":       msg,
+    })
+
+
+def flush_events():
+    """Block until every queued event has been sent (or failed)."""
+    if _writer_started:
+        _event_queue.join()
+
+
+def push_events(rows: list):
+    """
+    Insert many live log events in one request.
+    Each row: {"scan_id", "timestamp", "agent", "level", "msg"}.
+    """
+    if not rows:
+        return
     try:
-        supabase.table("scan_events").insert({
-            "scan_id":   scan_id,
-            "timestamp": time.strftime("%H:%M:%S"),
-            "agent":     agent,
-            "level":     level,
-            "msg":       msg,
-        }).execute()
+        _with_retry(lambda: get_client().table("scan_events").insert(rows).execute(),
+                    idempotent=False)
     except Exception as e:
-        print(f"  [Supabase] push_event error: {e}")
+        print(f"  [Supabase] push_events error ({len(rows)} rows): {e}")
 
 
 # ─────────────────────────────────────────────────────────────────
 # VIOLATIONS TABLE
 # ─────────────────────────────────────────────────────────────────
 
+# One violation per (scan, rule, section, type) — matches uq_violations_identity
+VIOLATION_CONFLICT_KEYS = "scan_id,rule_id,section,violation_type"
+
+
 def save_violations(scan_id: str, violations: list):
-    """Insert each violation as a separate row for easy querying."""
+    """
+    Insert each violation as a separate row for easy querying.
+    One upsert request; re-saving a scan's violations skips rows already stored.
+    """
     if not violations:
         return
     try:
-        rows = []
-        for v in violations:
-            rows.append({
-                "scan_id":          scan_id,
-                "rule_id":          v.get("rule_id", ""),
-                "section":          v.get("section", ""),
-                "violation_type":   v.get("violation_type", ""),
-                "severity":         v.get("severity", "LOW"),
-                "penalty_min_usd":  v.get("penalty_min_usd") or 0,
-                "penalty_max_usd":  v.get("penalty_max_usd") or 0,
-                "evidence":         v.get("evidence", {}),
-                "recommendation":   v.get("recommendation", ""),
-                "llm_explanation":  v.get("llm_explanation", ""),
-                "llm_technical_fix":v.get("llm_technical_fix", ""),
-            })
-        supabase.table("violations").insert(rows).execute()
+        rows = [{
+            "scan_id":          scan_id,
+            "rule_id":          v.get("rule_id", ""),
+            "section":          v.get("section", ""),
+            "violation_type":   v.get("violation_type", ""),
+            "severity":         v.get("severity", "LOW"),
+            "penalty_min_usd":  v.get("penalty_min_usd") or 0,
+            "penalty_max_usd":  v.get("penalty_max_usd") or 0,
+            "evidence":         v.get("evidence", {}),
+            "recommendation":   v.get("recommendation", ""),
+            "llm_explanation":  v.get("llm_explanation", ""),
+            "llm_technical_fix":v.get("llm_technical_fix", ""),
+        } for v in violations]
+        try:
+            _with_retry(lambda: get_client().table("violations").upsert(
+                rows, on_conflict=VIOLATION_CONFLICT_KEYS, ignore_duplicates=True).execute())
+        except Exception as e:
+            # 42P10: database predates the unique index in schema.sql
+            if "42P10" not in str(e):
+                raise
+            _with_retry(lambda: get_client().table("violations").insert(rows).execute(),
+                        idempotent=False)
         print(f"  [Supabase] {len(rows)} violations saved to DB")
     except Exception as e:
         print(f"  [Supabase] save_violations error: {e}")
@@ -153,37 +278,90 @@ def save_violations(scan_id: str, violations: list):
 # ─────────────────────────────────────────────────────────────────
 
 BUCKET = "apo-reports"
+# Public object URLs are deterministic — built locally, no Storage call
+SUPABASE_PUBLIC_BASE = f"{(SUPABASE_URL or '').rstrip('/')}/storage/v1/object/public/{BUCKET}"
+GZIP_MIN_BYTES = 16 * 1024   # smaller payloads are not worth compressing (compress=True only)
+UPLOAD_RETRIES = 3
 
+# Uploads run on a small pool so the pipeline never waits on TLS + transfer;
+# wait_for_uploads() is the join point before a scan is marked complete.
+_upload_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sb-upload")
+_pending: list[Future] = []
+_pending_lock = threading.Lock()
 
-def upload_file(scan_id: str, filename: str, data: dict | list | str):
-    """
-    Upload any JSON output file to Supabase Storage.
-    Path inside bucket: {scan_id}/{filename}
-    """
+
+def _do_upload_with_retry(scan_id: str, filename: str, data: dict | list | str,
+                          compress: bool = False):
     try:
         if isinstance(data, (dict, list)):
-            content = json.dumps(data, indent=2).encode("utf-8")
+            content = orjson.dumps(data)   # compact — nobody reads the bucket copy by eye
         else:
             content = data.encode("utf-8") if isinstance(data, str) else data
 
-        path = f"{scan_id}/{filename}"
-        # upsert=True overwrites if file already exists
-        supabase.storage.from_(BUCKET).upload(
-            path, content,
-            file_options={"content-type": "application/json", "upsert": "true"}
+        # upsert=True overwrites if file already exists, so a retry is safe
+        file_options = {"content-type": "application/json", "upsert": "true"}
+        if compress and len(content) > GZIP_MIN_BYTES:
+            # Stored as plain gzip bytes, labelled as such — Storage is not
+            # relied on to serve a Content-Encoding header
+            content = gzip.compress(content, compresslevel=6)
+            file_options["content-type"] = "application/gzip"
+    except Exception as e:
+        print(f"  [Supabase Storage] upload error for {filename}: {e}")
+        return None
+
+    path = f"{scan_id}/{filename}"
+    try:
+        _with_retry(
+            lambda: get_client().storage.from_(BUCKET).upload(path, content, file_options=file_options),
+            tries=UPLOAD_RETRIES,
         )
-        print(f"  [Supabase Storage] Uploaded {filename} → {BUCKET}/{path}")
-        return get_public_url(scan_id, filename)
     except Exception as e:
         print(f"  [Supabase Storage] upload error for {filename}: {e}")
         return None
+    print(f"  [Supabase Storage] Uploaded {filename} → {BUCKET}/{path}")
+    return get_public_url(scan_id, filename)
+
+
+def upload_file(scan_id: str, filename: str, data: dict | list | str,
+                compress: bool = False) -> Future:
+    """
+    Upload any JSON output file to Supabase Storage in the background.
+    Path inside bucket: {scan_id}/{filename}
+    compress=True stores payloads over GZIP_MIN_BYTES as gzip bytes — only
+    for objects read back through the backend, which checks the gzip magic
+    bytes; public-URL readers always get plain JSON otherwise.
+    Returns a Future resolving to the public URL (None on failure).
+    `data` must not be mutated until the future is done.
+    """
+    fut = _upload_pool.submit(_do_upload_with_retry, scan_id, filename, data, compress)
+    with _pending_lock:
+        _pending.append(fut)
+    return fut
+
+
+def wait_for_uploads(futures: list[Future] | None = None):
+    """Block until the given uploads (default: every pending one) have finished."""
+    with _pending_lock:
+        if futures is None:
+            futures = list(_pending)
+        done = set(futures)
+        _pending[:] = [f for f in _pending if f not in done]
+    wait(futures)
+
 
+atexit.register(wait_for_uploads)
 
-def get_public_url(scan_id: str, filename: str) -> str:
-    """Get the public download URL of an uploaded file."""
+
+def get_public_url(scan_id: str, filename: str, verify: bool = False) -> str:
+    """
+    Get the public download URL of an uploaded file.
+    verify=True asks the Storage client instead (debugging only).
+    """
+    if not verify:
+        return f"{SUPABASE_PUBLIC_BASE}/{scan_id}/{filename}"
     try:
         path = f"{scan_id}/{filename}"
-        res = supabase.storage.from_(BUCKET).get_public_url(path)
+        res = get_client().storage.from_(BUCKET).get_public_url(path)
         return res
     except Exception:
         return ""
@@ -3,23 +3,95 @@ APO v2 — Core Browser Tools (10 tools)
 All Playwright-based tools used by every agent tier.
 """
 
+import asyncio
+import bisect
+import operator
 import re
 import time
-import json
+import weakref
+import orjson
+from contextlib import asynccontextmanager
 from pathlib import Path
-from playwright.async_api import Page
+from playwright.async_api import BrowserContext, Page
 
 from core.config import (
     ACTION_DELAY_MS, PAGE_LOAD_TIMEOUT,
     SCROLL_STEPS, GPC_HEADER_KEY, GPC_HEADER_VALUE,
-    GPC_JS_SCRIPT, KNOWN_TRACKERS, PII_PATTERNS,
-    TEMPORAL_LEAK_MS
+    PII_PATTERNS, PII_REGEX,
+    TEMPORAL_LEAK_MS, BLOCKED_RESOURCE_TYPES, is_tracker
 )
 
+# Compiled once at import; the listener runs these on every captured request
+_PII_RE = {name: re.compile(pat, re.IGNORECASE) for name, pat in PII_PATTERNS.items()}
+
+
+# ═══════════════════════════════════════════════════════════════
+# Page pool — lets one browser context serve K concurrent visits
+# ═══════════════════════════════════════════════════════════════
+class BrowserPagePool:
+    """
+    Fixed set of pages opened on a single context.
+    Callers check a page out with `async with pool.page() as p:`
+    and it is returned to the pool when the block exits.
+    """
+
+    def __init__(self, context: BrowserContext, max_pages: int = 4):
+        self._context   = context
+        self._max_pages = max(1, max_pages)
+        self._pages: list[Page] = []
+        self._free: asyncio.Queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "BrowserPagePool":
+        for _ in range(self._max_pages):
+            p = await self._context.new_page()
+            self._pages.append(p)
+            self._free.put_nowait(p)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        for p in self._pages:
+            try:
+                await p.close()
+            except Exception:
+                pass
+        self._pages.clear()
+
+    @asynccontextmanager
+    async def page(self):
+        p = await self._free.get()
+        try:
+            yield p
+        finally:
+            self._free.put_nowait(p)
+
+
+# ═══════════════════════════════════════════════════════════════
+# Resource blocking — skip images/fonts/media on every page of a context
+# ═══════════════════════════════════════════════════════════════
+async def block_heavy_resources(context: BrowserContext) -> None:
+    """
+    Abort image/media/font requests for the whole context.
+    Scripts, XHR/fetch and stylesheets (needed for visibility checks) load
+    normally, and tracker hosts are never aborted so pixels still fire.
+    """
+    async def _route(route):
+        req = route.request
+        if req.resource_type in BLOCKED_RESOURCE_TYPES:
+            url = req.url
+            domain = url.split("/")[2] if "//" in url else ""
+            if not is_tracker(domain):
+                await route.abort()
+                return
+        await route.continue_()
+
+    await context.route("**/*", _route)
+
+
 # ═══════════════════════════════════════════════════════════════
 # TOOL 1: navigate_to_page
 # ═══════════════════════════════════════════════════════════════
 async def navigate_to_page(page: Page, url: str) -> dict:
+    _forget_consent_scan(page)
     try:
         response = await page.goto(url, wait_until="domcontentloaded",
                                    timeout=PAGE_LOAD_TIMEOUT)
@@ -37,17 +109,23 @@ async def navigate_to_page(page: Page, url: str) -> dict:
 # ═══════════════════════════════════════════════════════════════
 # TOOL 2: click_element
 # ═══════════════════════════════════════════════════════════════
+# One selector list → the browser resolves every candidate in a single query
+_MODAL_CLOSE_SELECTOR = ",".join(
+    f"{sel}:visible" for sel in
+    ["[aria-label='Close']", "button.close", ".modal-close",
+     ".cookie-accept", "button#accept-all", "[data-dismiss='modal']"]
+)
+
+
 async def dismiss_modal(page: Page) -> None:
-    for sel in ["[aria-label='Close']", "button.close", ".modal-close",
-                ".cookie-accept", "button#accept-all", "[data-dismiss='modal']"]:
-        try:
-            el = await page.query_selector(sel)
-            if el and await el.is_visible():
-                await el.click()
-                await page.wait_for_timeout(400)
-                return
-        except Exception:
-            pass
+    try:
+        close = page.locator(_MODAL_CLOSE_SELECTOR).first
+        if await close.count():
+            await close.click(timeout=2000)
+            await page.wait_for_timeout(400)
+            return
+    except Exception:
+        pass
     try:
         await page.keyboard.press("Escape")
         await page.wait_for_timeout(200)
@@ -58,8 +136,9 @@ async def dismiss_modal(page: Page) -> None:
 async def click_element(page: Page, selector: str) -> dict:
     await dismiss_modal(page)
     try:
-        await page.wait_for_selector(selector, timeout=5000)
-        await page.evaluate(f"document.querySelector('{selector}')?.click()")
+        # Native click: waits for actionability itself, and the selector is
+        # never interpolated into page JS
+        await page.locator(selector).first.click(timeout=5000)
         await page.wait_for_timeout(ACTION_DELAY_MS)
         return {"status": "ok", "clicked": selector}
     except Exception as e:
@@ -91,8 +170,12 @@ async def fill_form_field(page: Page, selector: str, value: str,
 # TOOL 4: inject_gpc_signal
 # ═══════════════════════════════════════════════════════════════
 async def inject_gpc_signal(page: Page) -> dict:
+    """
+    Verify the GPC signal on the current document. The script itself is
+    registered once per context (context.add_init_script(GPC_JS_SCRIPT)),
+    so every page of a compliance session inherits it on navigation.
+    """
     try:
-        await page.add_init_script(GPC_JS_SCRIPT)
         gpc_value = await page.evaluate("() => navigator.globalPrivacyControl")
         return {"status": "ok", "gpc_active": bool(gpc_value)}
     except Exception as e:
@@ -116,33 +199,35 @@ async def scroll_page(page: Page, steps: int = SCROLL_STEPS) -> dict:
 # ═══════════════════════════════════════════════════════════════
 # TOOL 6: save_session_state
 # ═══════════════════════════════════════════════════════════════
+_STORAGE_DUMP_JS = """() => {
+    const dump = (s) => {
+        const data = {};
+        for (let i = 0; i < s.length; i++) {
+            const k = s.key(i);
+            data[k] = s.getItem(k);
+        }
+        return data;
+    };
+    return {local: dump(localStorage), session: dump(sessionStorage)};
+}"""
+
+
 async def save_session_state(page: Page, output_path: Path) -> dict:
     try:
         context = page.context
-        cookies = await context.cookies()
-        local_storage = await page.evaluate("""() => {
-            let data = {};
-            for (let i = 0; i < localStorage.length; i++) {
-                let k = localStorage.key(i);
-                data[k] = localStorage.getItem(k);
-            }
-            return data;
-        }""")
-        session_storage = await page.evaluate("""() => {
-            let data = {};
-            for (let i = 0; i < sessionStorage.length; i++) {
-                let k = sessionStorage.key(i);
-                data[k] = sessionStorage.getItem(k);
-            }
-            return data;
-        }""")
+        # Cookies + both storages in two concurrent round-trips (was three serial)
+        cookies, storage = await asyncio.gather(
+            context.cookies(), page.evaluate(_STORAGE_DUMP_JS)
+        )
         state = {
             "cookies": cookies,
-            "local_storage": local_storage,
-            "session_storage": session_storage,
+            "local_storage": storage["local"],
+            "session_storage": storage["session"],
             "url": page.url,
         }
-        Path(output_path).write_text(json.dumps(state, indent=2))
+        data = orjson.dumps(state, option=orjson.OPT_INDENT_2)
+        # Disk write off the loop — the other session keeps running meanwhile
+        await asyncio.to_thread(Path(output_path).write_bytes, data)
         return {"status": "ok", "cookies_saved": len(cookies)}
     except Exception as e:
         return {"status": "error", "msg": str(e)}
@@ -152,10 +237,15 @@ async def save_session_state(page: Page, output_path: Path) -> dict:
 # TOOL 7: Traffic capture factory
 # Returns a (log, on_request_handler) tuple
 # ═══════════════════════════════════════════════════════════════
-def make_traffic_listener(session_label: str) -> tuple[list, callable]:
+def make_traffic_listener(session_label: str, sink=None,
+                          page_trackers: list | None = None) -> tuple[list, callable]:
     """
     Returns (log_list, on_request_handler).
     Each captured request includes timestamp for temporal leak analysis.
+    If `sink` (a binary file handle) is given, every record is also appended
+    to it as one JSON line the moment it is captured.
+    If `page_trackers` is given, tracker records are also appended to it;
+    the caller clears it at the start of each page.
     """
     log = []
     gpc_start_time = None   # set externally when GPC is injected
@@ -163,44 +253,163 @@ def make_traffic_listener(session_label: str) -> tuple[list, callable]:
     def on_request(request):
         url = request.url
         domain = url.split("/")[2] if "//" in url else ""
-        is_tracker = any(t in domain for t in KNOWN_TRACKERS)
+        tracker = is_tracker(domain)
+        # One combined scan rejects the common no-PII URL before per-type checks
         pii_found = [
-            name for name, pat in PII_PATTERNS.items()
-            if re.search(pat, url, re.IGNORECASE)
-        ]
-        ts_ms = int(time.time() * 1000)
-        log.append({
+            name for name, rx in _PII_RE.items() if rx.search(url)
+        ] if PII_REGEX.search(url) else []
+        rec = {
             "session":       session_label,
             "url":           url,
             "method":        request.method,
             "domain":        domain,
-            "timestamp_ms":  ts_ms,
-            "is_tracker":    is_tracker,
+            "timestamp_ms":  time.time_ns() // 1_000_000,      # wall clock (evidence)
+            "mono_ms":       time.monotonic_ns() // 1_000_000, # interval math
+            "is_tracker":    tracker,
             "pii_detected":  pii_found,
             "resource_type": request.resource_type,
-        })
+        }
+        log.append(rec)
+        if tracker and page_trackers is not None:
+            page_trackers.append(rec)
+        if sink is not None:
+            sink.write(orjson.dumps(rec) + b"\n")
 
     return log, on_request
 
 
+def jsonl_to_json_array(jsonl_path: Path, json_path: Path) -> int:
+    """
+    Rewrite a JSON-lines file as a single JSON array, line by line,
+    without building the whole document in memory. Returns record count.
+    """
+    count = 0
+    with open(jsonl_path, "rb") as src, open(json_path, "wb") as dst:
+        dst.write(b"[")
+        for line in src:
+            line = line.rstrip(b"\n")
+            if not line:
+                continue
+            if count:
+                dst.write(b",\n")
+            dst.write(line)
+            count += 1
+        dst.write(b"]\n")
+    return count
+
+
+# ═══════════════════════════════════════════════════════════════
+# Consent UI scan — one in-page DOM pass shared by TOOLS 8–10
+# ═══════════════════════════════════════════════════════════════
+_BANNER_SELECTORS = [
+    "[class*='cookie']", "[id*='cookie']",
+    "[class*='consent']", "[id*='consent']",
+    "[class*='gdpr']", "[id*='privacy-banner']",
+    "div[aria-label*='cookie']",
+]
+_DNS_PATTERNS = [
+    "do not sell", "do not share", "your privacy choices",
+    "california privacy", "opt-out", "opt out",
+    "limit the use", "your ad choices",
+]
+_ACCEPT_PATTERNS = [
+    "accept all", "allow all", "agree", "accept cookies",
+    "i accept", "allow cookies", "got it", "i agree", "accept"
+]
+_REJECT_PATTERNS = [
+    "reject all", "decline all", "reject", "decline",
+    "necessary only", "only essential", "decline cookies",
+    "no thanks", "save settings"
+]
+# Fallback CSS selectors when no button text matches
+_ACCEPT_SELECTORS = ["#accept-all", ".accept-all", "#cookie-accept",
+                     ".cookie-accept-all", "[id*='accept-all']"]
+_REJECT_SELECTORS = ["#reject-all", ".reject-all", "#cookie-reject",
+                     ".cookie-reject-all", "[id*='reject-all']"]
+
+# Visibility mirrors Playwright's is_visible(): non-empty box, not visibility:hidden.
+# The chosen consent buttons are tagged data-apo-accept / data-apo-reject so
+# Python can click them with a real (actionability-checked) Playwright click.
+_CONSENT_SCAN_JS = """(cfg) => {
+    const visible = (el) => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== "hidden";
+    };
+    const text = (el) => (el.innerText || "").trim().toLowerCase();
+
+    // Any visible match counts — a hidden first match must not mask the banner
+    const banner = cfg.bannerSelectors.filter(
+        (sel) => Array.prototype.some.call(document.querySelectorAll(sel), visible));
+
+    const dnsTexts = new Set();
+    for (const el of document.querySelectorAll("a, button, [role='link']")) {
+        const t = text(el);
+        if (cfg.dnsPatterns.some((p) => t.includes(p))) dnsTexts.add(t.slice(0, 80));
+    }
+
+    const buttons = [...document.querySelectorAll("button, a, [role='button']")]
+        .filter(visible).map((el) => [el, text(el)]);
+    const pick = (patterns, selectors, attr) => {
+        document.querySelectorAll(`[${attr}]`).forEach((el) => el.removeAttribute(attr));
+        for (const [el, t] of buttons) {
+            if (t && patterns.some((p) => t.includes(p))) {
+                el.setAttribute(attr, "");
+                return {button_text: t.slice(0, 50)};
+            }
+        }
+        for (const sel of selectors) {
+            const el = document.querySelector(sel);
+            if (el && visible(el)) {
+                el.setAttribute(attr, "");
+                return {selector: sel};
+            }
+        }
+        return null;
+    };
+
+    return {
+        banner,
+        dns_links: [...dnsTexts],
+        accept: pick(cfg.acceptPatterns, cfg.acceptSelectors, "data-apo-accept"),
+        reject: pick(cfg.rejectPatterns, cfg.rejectSelectors, "data-apo-reject"),
+    };
+}"""
+_CONSENT_SCAN_ARGS = {
+    "bannerSelectors": _BANNER_SELECTORS, "dnsPatterns": _DNS_PATTERNS,
+    "acceptPatterns": _ACCEPT_PATTERNS, "rejectPatterns": _REJECT_PATTERNS,
+    "acceptSelectors": _ACCEPT_SELECTORS, "rejectSelectors": _REJECT_SELECTORS,
+}
+
+# page → (url, task): concurrent callers on the same page load share one scan
+_consent_scans: "weakref.WeakKeyDictionary[Page, tuple]" = weakref.WeakKeyDictionary()
+
+
+def _forget_consent_scan(page: Page) -> None:
+    _consent_scans.pop(page, None)
+
+
+async def _scan_consent_ui(page: Page) -> dict:
+    """One evaluate → {"banner", "dns_links", "accept", "reject"}, memoised per page URL."""
+    hit = _consent_scans.get(page)
+    if hit is None or hit[0] != page.url:
+        task = asyncio.ensure_future(page.evaluate(_CONSENT_SCAN_JS, _CONSENT_SCAN_ARGS))
+        hit = (page.url, task)
+        _consent_scans[page] = hit
+    try:
+        return await asyncio.shield(hit[1])
+    except Exception:
+        _forget_consent_scan(page)
+        raise
+
+
 # ═══════════════════════════════════════════════════════════════
 # TOOL 8: detect_cookie_banner
 # ═══════════════════════════════════════════════════════════════
 async def detect_cookie_banner(page: Page) -> dict:
-    selectors = [
-        "[class*='cookie']", "[id*='cookie']",
-        "[class*='consent']", "[id*='consent']",
-        "[class*='gdpr']", "[id*='privacy-banner']",
-        "div[aria-label*='cookie']",
-    ]
-    found = []
-    for sel in selectors:
-        try:
-            el = await page.query_selector(sel)
-            if el and await el.is_visible():
-                found.append(sel)
-        except Exception:
-            pass
+    try:
+        found = (await _scan_consent_ui(page))["banner"]
+    except Exception:
+        found = []
     return {"banner_detected": bool(found), "matched_selectors": found}
 
 
@@ -209,26 +418,11 @@ async def detect_cookie_banner(page: Page) -> dict:
 # CCPA §1798.135(a) — required on every page
 # ═══════════════════════════════════════════════════════════════
 async def detect_do_not_sell_link(page: Page) -> dict:
-    patterns = [
-        "do not sell", "do not share", "your privacy choices",
-        "california privacy", "opt-out", "opt out",
-        "limit the use", "your ad choices",
-    ]
-    found_texts = []
     try:
-        links = await page.query_selector_all("a, button, [role='link']")
-        for link in links:
-            try:
-                text = (await link.inner_text()).strip().lower()
-                for p in patterns:
-                    if p in text:
-                        found_texts.append(text[:80])
-                        break
-            except Exception:
-                pass
+        found_texts = (await _scan_consent_ui(page))["dns_links"]
     except Exception:
-        pass
-    return {"link_found": bool(found_texts), "link_texts": list(set(found_texts))}
+        found_texts = []
+    return {"link_found": bool(found_texts), "link_texts": found_texts}
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -242,51 +436,21 @@ async def handle_cookie_consent(page: Page, accept_all: bool = True) -> dict:
     Finds and clicks the correct cookie consent button.
     accept_all=True  → Accept / Allow / Agree  (Baseline session)
     accept_all=False → Reject / Decline / Necessary only  (Compliance session)
+    Button text is matched first, then fallback CSS selectors.
     """
     action = "ACCEPT" if accept_all else "REJECT"
-
-    patterns_accept = [
-        "accept all", "allow all", "agree", "accept cookies",
-        "i accept", "allow cookies", "got it", "i agree", "accept"
-    ]
-    patterns_reject = [
-        "reject all", "decline all", "reject", "decline",
-        "necessary only", "only essential", "decline cookies",
-        "no thanks", "save settings"
-    ]
-    target_patterns = patterns_accept if accept_all else patterns_reject
+    kind   = "accept" if accept_all else "reject"
 
     try:
-        # Pass 1: Match button text
-        elements = await page.query_selector_all("button, a, [role='button']")
-        for el in elements:
-            try:
-                if not await el.is_visible():
-                    continue
-                text = (await el.inner_text()).strip().lower()
-                if not text:
-                    continue
-                if any(p in text for p in target_patterns):
-                    await el.click()
-                    await page.wait_for_timeout(ACTION_DELAY_MS)
-                    return {"status": "ok", "action": action, "button_text": text[:50]}
-            except Exception:
-                continue
-
-        # Pass 2: Fallback CSS selectors
-        selectors_accept = ["#accept-all", ".accept-all", "#cookie-accept",
-                            ".cookie-accept-all", "[id*='accept-all']"]
-        selectors_reject = ["#reject-all", ".reject-all", "#cookie-reject",
-                            ".cookie-reject-all", "[id*='reject-all']"]
-        for sel in (selectors_accept if accept_all else selectors_reject):
-            try:
-                el = await page.query_selector(sel)
-                if el and await el.is_visible():
-                    await el.click()
-                    await page.wait_for_timeout(ACTION_DELAY_MS)
-                    return {"status": "ok", "action": action, "selector": sel}
-            except Exception:
-                continue
+        match = (await _scan_consent_ui(page))[kind]
+        if match:
+            el = await page.query_selector(f"[data-apo-{kind}]")
+            if el:
+                await el.click()
+                # The click changes the DOM — the cached scan is now stale
+                _forget_consent_scan(page)
+                await page.wait_for_timeout(ACTION_DELAY_MS)
+                return {"status": "ok", "action": action, **match}
 
         return {"status": "not_found", "action": action,
                 "msg": "No matching cookie consent button found"}
@@ -298,19 +462,28 @@ async def handle_cookie_consent(page: Page, accept_all: bool = True) -> dict:
 # TOOL 10: detect_temporal_leak
 # Checks if trackers fired within TEMPORAL_LEAK_MS after a page load
 # ═══════════════════════════════════════════════════════════════
+_MONO_MS = operator.itemgetter("mono_ms")
+
+
 def detect_temporal_leak(traffic_log: list, page_load_ts_ms: int) -> list:
     """
     Returns list of tracker requests that fired within
     TEMPORAL_LEAK_MS milliseconds of page load.
     These represent temporal leaks — data escaped before opt-out processed.
+    page_load_ts_ms is a monotonic timestamp (time.monotonic_ns() // 1e6),
+    compared against each record's "mono_ms".
+    traffic_log must be in capture order (as the traffic listener appends
+    it), so the window end is found by binary search, not a full scan.
     """
     leaks = []
     window_end = page_load_ts_ms + TEMPORAL_LEAK_MS
-    for req in traffic_log:
-        if req["is_tracker"] and req["timestamp_ms"] <= window_end:
+    hi = bisect.bisect_right(traffic_log, window_end, key=_MONO_MS)
+    for i in range(hi):
+        req = traffic_log[i]
+        if req["is_tracker"]:
             leaks.append({
                 "domain": req["domain"],
                 "url": req["url"],
-                "fired_ms_after_load": req["timestamp_ms"] - page_load_ts_ms,
+                "fired_ms_after_load": req["mono_ms"] - page_load_ts_ms,
             })
     return leaks
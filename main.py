@@ -28,7 +28,7 @@ from core.config import (
 )
 from agents.tier1_discovery    import run_discovery_agent
 from agents.tier2_interaction  import run_interaction_agent
-from agents.tier3_observability import run_observability_agent
+from agents.tier3_observability import run_observability_agent, preload_rules
 
 
 def print_banner():
@@ -58,25 +58,21 @@ async def main(skip_discovery: bool = False):
         graph = await run_discovery_agent()
 
     # ── Tier 2: Interaction ───────────────────────────────────
+    # Tier 3's rules load in a worker thread while the browser sessions run
     print("\n[Tier 2] Starting Interaction Agent (parallel sessions)...")
-    session_results = await run_interaction_agent(graph)
-
-    # ── Fetch privacy policy text for LLM ────────────────────
-    policy_text = ""
-    policy_node = next(
-        (n for n in graph["interaction_graph"]["nodes"]
-         if "privacy" in n["value"].lower()),
-        None
+    session_results, _ = await asyncio.gather(
+        run_interaction_agent(graph),
+        asyncio.to_thread(preload_rules, JURISDICTION),
     )
-    if policy_node:
-        # Simple text extraction from session logs is enough
-        # (Full content was scrolled during session)
-        policy_text = f"Privacy policy page found at: {policy_node['value']}"
-        print(f"\n[Tier 3] Privacy policy page: {policy_node['value']}")
+
+    # Body text of the privacy policy page, read by the compliance session
+    policy_text = session_results.get("privacy_policy_text", "")
+    if policy_text:
+        print(f"\n[Tier 3] Privacy policy text: {len(policy_text):,} chars")
 
     # ── Tier 3: Observability ─────────────────────────────────
     print("\n[Tier 3] Starting Observability Agent...")
-    report = run_observability_agent(session_results, policy_text)
+    report = await asyncio.to_thread(run_observability_agent, session_results, policy_text)
 
     # ── Final Summary ─────────────────────────────────────────
     verdict = report["gpc_verdict"]["verdict"]
@@ -1,10 +1,11 @@
 """
 APO v2 — mitmproxy addon
 Runs as a proxy alongside Tier 2 browser sessions.
-Captures full request headers (Sec-GPC), response status codes,
-Set-Cookie headers, POST bodies, and tracker domain flags.
+Captures privacy-relevant request headers (Sec-GPC, Cookie, ...), response
+status codes, Set-Cookie headers, POST bodies, and tracker domain flags.
 Saves to output/raw_traffic_proxy.jsonl (one JSON per line).
 """
+import hashlib
 import json
 import time
 import os
@@ -27,27 +28,71 @@ OUTPUT_FILE = os.path.join(
 # Ensure output dir exists
 os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
+_EXACT = frozenset(TRACKERS)
+
+# Only these request headers are kept — the full dump leaked auth tokens and
+# bloated every record
+HEADER_WHITELIST = ("cookie", "sec-gpc", "referer", "origin", "user-agent")
+TEXT_BODY_TYPES  = ("text/", "application/json", "application/x-www-form-urlencoded")
+MAX_TEXT_BODY    = 64 * 1024
+
+# Buffered writes are flushed every FLUSH_EVERY records or FLUSH_INTERVAL_S
+# seconds, so a hard kill loses at most that much evidence
+FLUSH_EVERY      = 256
+FLUSH_INTERVAL_S = 1.0
+
+
 def _is_tracker(domain: str) -> bool:
+    """Exact host or any parent domain in TRACKERS — O(labels) set lookups."""
     domain = domain.lstrip(".")
-    return any(domain == t or domain.endswith("." + t) for t in TRACKERS)
+    while True:
+        if domain in _EXACT:
+            return True
+        dot = domain.find(".")
+        if dot < 0:
+            return False
+        domain = domain[dot + 1:]
+
+
+def _body_fields(req: http.Request) -> dict:
+    """Small text bodies verbatim; anything binary or large as a hash + size."""
+    body = req.content
+    if req.method not in ("POST", "PUT") or not body:
+        return {"post_body": None}
+    ct = req.headers.get("content-type", "")
+    if ct.startswith(TEXT_BODY_TYPES) and len(body) < MAX_TEXT_BODY:
+        return {"post_body": body.decode("utf-8", errors="replace")}
+    return {
+        "post_body": None,
+        "post_body_sha256": hashlib.sha256(body).hexdigest(),
+        "post_body_size": len(body),
+    }
 
 
 class APOProxyAddon:
     def __init__(self):
-        self._log_fh = open(OUTPUT_FILE, "a")
+        # 64 KiB buffer, flushed in bounded batches; done() flushes the tail
+        # on a clean SIGINT/SIGTERM shutdown.
+        self._log_fh = open(OUTPUT_FILE, "a", buffering=1 << 16)
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
 
     def _write(self, record: dict):
         self._log_fh.write(json.dumps(record) + "\n")
-        self._log_fh.flush()
+        self._unflushed += 1
+        now = time.monotonic()
+        if self._unflushed >= FLUSH_EVERY or now - self._last_flush >= FLUSH_INTERVAL_S:
+            self._log_fh.flush()
+            self._unflushed = 0
+            self._last_flush = now
 
     def request(self, flow: http.HTTPFlow):
         """Called for every outgoing request."""
         req = flow.request
         domain = req.pretty_host
 
-        # Check if GPC header is present
-        gpc_header = req.headers.get("sec-gpc", req.headers.get("Sec-GPC", None))
-
+        # mitmproxy headers are case-insensitive
+        headers = req.headers
         record = {
             "phase": "request",
             "timestamp_ms": int(time.time() * 1000),
@@ -55,9 +100,9 @@ class APOProxyAddon:
             "url": req.pretty_url,
             "domain": domain,
             "is_tracker": _is_tracker(domain),
-            "gpc_sent": gpc_header,
-            "headers": dict(req.headers),
-            "post_body": req.content.decode("utf-8", errors="replace") if req.method in ("POST", "PUT") and req.content else None,
+            "gpc_sent": headers.get("sec-gpc"),
+            "headers": {h: headers[h] for h in HEADER_WHITELIST if h in headers},
+            **_body_fields(req),
         }
         self._write(record)
 
@@ -82,6 +127,7 @@ class APOProxyAddon:
         self._write(record)
 
     def done(self):
+        self._log_fh.flush()
         self._log_fh.close()
 
 
@@ -73,6 +73,10 @@ CREATE TABLE IF NOT EXISTS violations (
 CREATE INDEX IF NOT EXISTS idx_violations_scan_id ON violations(scan_id);
 -- Index for filtering by severity
 CREATE INDEX IF NOT EXISTS idx_violations_severity ON violations(severity);
+-- One row per rule finding per scan — lets save_violations upsert with
+-- ON CONFLICT DO NOTHING instead of inserting duplicates on a re-save
+CREATE UNIQUE INDEX IF NOT EXISTS uq_violations_identity
+    ON violations(scan_id, rule_id, section, violation_type);
 
 
 -- ============================================================
@@ -1,16 +1,15 @@
 import asyncio
-from backend import app, _run_scan, ScanRequest, SCANS
+from backend import app, _run_scan, ScanRequest, SCANS, SUPABASE_ENABLED, new_scan_entry
 
-SCANS["test_id"] = {
-    "status": "pending",
-    "events": [],
-    "phase": "idle",
-    "progress": {"discovery": 0, "interaction": 0, "observability": 0}
-}
 req = ScanRequest(url="https://www.cpchem.com", framework="CCPA", crawl_depth=1, use_llm=False)
+SCANS["test_id"] = new_scan_entry(req)
 
 # Let's run it directly
 _run_scan("test_id", req)
 
 for ev in SCANS["test_id"]["events"]:
     print(ev)
+
+if SUPABASE_ENABLED:
+    from core.supabase_store import flush_events
+    flush_events()